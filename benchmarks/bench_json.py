@@ -0,0 +1,120 @@
+"""jsonify throughput: Flask's stdlib provider versus FastJSONProvider.
+
+Encodes the largest list payloads (consultations, orders) and the affiliate
+marketing materials through a full ``jsonify`` response. Run from the
+project root:
+
+    python -m benchmarks.bench_json --records 10000
+"""
+import argparse
+import datetime
+import time
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from src.models.user import db
+from src.models.affiliate import Affiliate
+from src.models.consultation import Consultation
+from src.models.order import Order
+from src.routes.affiliate import affiliate_bp
+from src.utils import json_provider
+from src.utils.json_provider import FastJSONProvider
+
+
+def make_consultations(count):
+    now = datetime.datetime.now()
+    return [Consultation(
+        id=f'CONS_{i:016x}',
+        package='Professional',
+        developer_id=i % 3 + 1,
+        developer_name='Alex Chen',
+        developer_email='alex@handleserv.com',
+        date='2025-07-01',
+        time='10:00',
+        client={'name': f'Client {i}', 'email': f'client{i}@example.com',
+                'phone': '+1 555 0100', 'company': 'Acme', 'message': 'Looking for a rebuild'},
+        client_email=f'client{i}@example.com',
+        status='scheduled',
+        created_at=now,
+        zoom_link=f'https://zoom.us/j/{i}',
+        calendly_link='https://calendly.com/handleserv',
+    ) for i in range(count)]
+
+
+def make_orders(count):
+    now = datetime.datetime.now()
+    return [Order(
+        id=i,
+        client_name=f'Client {i}',
+        client_email=f'client{i}@example.com',
+        package='Enterprise',
+        project_type='E-commerce',
+        requirements='Catalog, checkout, admin dashboard and a headless CMS. ' * 3,
+        deadline='2025-09-01',
+        price=999.0,
+        status='In Progress',
+        created_at=now,
+    ) for i in range(count)]
+
+
+def marketing_materials(app):
+    with app.app_context():
+        db.create_all()
+        db.session.add(Affiliate(name='Bench', email='bench@example.com', affiliate_code='BENCH',
+                                 commission_rate=0.15, status='active', joined_date='2025-01-01'))
+        db.session.commit()
+    response = app.test_client().post('/api/affiliate/generate-links', json={'affiliate_code': 'BENCH'})
+    return response.get_json()
+
+
+def time_response(app, build, iterations):
+    with app.test_request_context():
+        jsonify(build())  # warm up
+        size = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            size = len(jsonify(build()).get_data())
+        elapsed = time.perf_counter() - start
+    return iterations / elapsed, size * iterations / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=10_000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(affiliate_bp, url_prefix='/api')
+
+    consultations = make_consultations(args.records)
+    orders = make_orders(args.records)
+    materials = marketing_materials(app)
+    # Each case builds its payload inside the timed loop, as a route would
+    payloads = {
+        'consultations (dicts)': lambda: {'success': True, 'consultations': [c.to_dict() for c in consultations]},
+        'consultations (models)': lambda: {'success': True, 'consultations': consultations},
+        'orders (dicts)': lambda: {'success': True, 'orders': [o.to_dict() for o in orders]},
+        'orders (models)': lambda: {'success': True, 'orders': orders},
+        'marketing materials': lambda: materials,
+    }
+    if json_provider.orjson is None:
+        print('orjson is not installed; FastJSONProvider falls back to stdlib json')
+
+    providers = {
+        'stdlib': type('StdlibProvider', (DefaultJSONProvider,), {'default': staticmethod(json_provider._default)}),
+        'fast': FastJSONProvider,
+    }
+    for name, build in payloads.items():
+        iterations = args.iterations if 'materials' not in name else args.iterations * 1000
+        for provider_name, provider in providers.items():
+            app.json = provider(app)
+            rate, throughput = time_response(app, build, iterations)
+            print(f"{name:<24} {provider_name:<7} {rate:10.1f} responses/s {throughput:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Top-10 affiliate leaderboard: full sort versus top-K strategies.
+
+Run from the project root:
+
+    python -m benchmarks.bench_leaderboard --affiliates 100000
+"""
+import argparse
+import datetime
+import heapq
+import random
+from operator import itemgetter
+
+from flask import Flask
+from sqlalchemy import insert
+
+from benchmarks.harness import percentile, time_calls
+from src.models.user import db
+from src.models.affiliate import Affiliate, Referral
+from src.routes.affiliate import LEADERBOARD_SIZE, period_start, windowed_leaderboard
+
+
+def make_affiliates(count, rng):
+    return [{
+        'id': i,
+        'name': f'Affiliate {i}',
+        'email': f'affiliate{i}@example.com',
+        'affiliate_code': f'AFF{i}',
+        'commission_rate': 0.15,
+        'total_earnings': round(rng.uniform(0, 10000), 2),
+        'total_referrals': rng.randrange(100),
+        'referral_count': 0,
+        'pending_commission': 0.0,
+        'paid_commission': 0.0,
+        'status': 'active',
+        'joined_date': '2025-01-01',
+    } for i in range(1, count + 1)]
+
+
+def make_referrals(count, affiliates, rng):
+    today = datetime.date.today()
+    return [{
+        'affiliate_id': rng.randint(1, affiliates),
+        'customer_email': f'customer{i}@example.com',
+        'order_value': 599.0,
+        'commission_earned': 89.85,
+        'status': rng.choice(('pending', 'paid', 'cancelled')),
+        'date': (today - datetime.timedelta(days=rng.randrange(365))).strftime('%Y-%m-%d'),
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--affiliates', type=int, default=100_000)
+    parser.add_argument('--referrals', type=int, default=500_000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    records = make_affiliates(args.affiliates, rng)
+    by_earnings = itemgetter('total_earnings')
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Affiliate), records)
+        db.session.execute(insert(Referral), make_referrals(args.referrals, args.affiliates, rng))
+        db.session.commit()
+
+        def indexed_query():
+            return (db.session.query(Affiliate.name, Affiliate.total_earnings)
+                    .order_by(Affiliate.total_earnings.desc())
+                    .limit(LEADERBOARD_SIZE).all())
+
+        cases = {
+            'sorted() over all affiliates': lambda: sorted(records, key=by_earnings, reverse=True)[:LEADERBOARD_SIZE],
+            'heapq.nlargest': lambda: heapq.nlargest(LEADERBOARD_SIZE, records, key=by_earnings),
+            'indexed ORDER BY ... LIMIT': indexed_query,
+            'windowed (this week)': lambda: windowed_leaderboard(period_start('week')),
+            'windowed (this month)': lambda: windowed_leaderboard(period_start('month')),
+        }
+        for name, fn in cases.items():
+            samples = time_calls(fn, [()] * args.iterations)
+            print(f"{name:<30} p50={percentile(samples, 50):10.1f}us p99={percentile(samples, 99):10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Indexed order lookup latency at increasing table sizes.
+
+Times the indexed queries directly and through GET /api/orders, so the
+filters are also measured on the route clients call. Run from the project
+root:
+
+    python -m benchmarks.bench_orders --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import random
+
+from flask import Flask
+from sqlalchemy import insert, select
+
+from benchmarks.harness import percentile, time_calls
+from src.models.user import db
+from src.models.order import Order
+from src.routes.orders import orders_bp
+from src.utils.json_provider import FastJSONProvider
+
+STATUSES = ['Pending Payment', 'Paid', 'In Progress', 'Completed', 'Cancelled']
+
+
+def create_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    return app
+
+
+def fill(size, clients, chunk=50_000):
+    now = datetime.datetime.now()
+    for offset in range(0, size, chunk):
+        rows = [{
+            'client_name': f'Client {i % clients}',
+            'client_email': f'client{i % clients}@example.com',
+            'package': 'Starter',
+            'status': STATUSES[i % len(STATUSES)],
+            'created_at': now,
+        } for i in range(offset, min(size, offset + chunk))]
+        db.session.execute(insert(Order), rows)
+    db.session.commit()
+
+
+def by_id(order_id):
+    return db.session.execute(select(Order).where(Order.id == order_id)).scalar_one()
+
+
+def by_filters(status, client_email):
+    query = select(Order).where(Order.client_email == client_email)
+    if status is not None:
+        query = query.where(Order.status == status)
+    return db.session.execute(query).scalars().all()
+
+
+def make_route_call(client):
+    def by_route(status, client_email):
+        params = {'client_email': client_email}
+        if status is not None:
+            params['status'] = status
+        response = client.get('/api/orders', query_string=params)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET /api/orders returned {response.status_code}')
+    return by_route
+
+
+def run(size, iterations):
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        clients = max(1, size // 20)
+        fill(size, clients)
+        rng = random.Random(size)
+
+        ids = [(rng.randint(1, size),) for _ in range(iterations)]
+        emails = [(None, f'client{rng.randrange(clients)}@example.com') for _ in range(iterations)]
+        combined = [(rng.choice(STATUSES), email) for _, email in emails]
+
+        by_route = make_route_call(app.test_client())
+        results = {
+            'get by id': time_calls(by_id, ids),
+            'filter client_email': time_calls(by_filters, emails),
+            'filter status+client_email': time_calls(by_filters, combined),
+            'GET /api/orders?client_email': time_calls(by_route, emails),
+            'GET /api/orders?status&email': time_calls(by_route, combined),
+        }
+        for name, samples in results.items():
+            print(f"{size:>9} {name:<30} p50={percentile(samples, 50):8.2f}us "
+                  f"p99={percentile(samples, 99):8.2f}us")
+        db.session.remove()
+        db.drop_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--iterations', type=int, default=5_000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
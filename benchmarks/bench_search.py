@@ -0,0 +1,91 @@
+"""Search latency over a large synthetic corpus: InvertedIndex versus FTS5.
+
+Indexes ``--records`` order-like documents in both backends, then times a
+mix of exact, multi-word and prefix queries. Run from the project root:
+
+    python -m benchmarks.bench_search --records 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from benchmarks.harness import percentile
+from src.services.search import FTS5Index, InvertedIndex
+
+FIRST_NAMES = ['james', 'maria', 'wei', 'aisha', 'lucas', 'sofia', 'omar', 'yuki', 'elena', 'kofi']
+LAST_NAMES = ['smith', 'garcia', 'chen', 'khan', 'muller', 'rossi', 'haddad', 'tanaka', 'ivanova', 'mensah']
+PROJECT_TYPES = ['business website', 'online shop', 'landing page', 'web application', 'portfolio']
+WORDS = ('stripe checkout booking calendar blog multilingual seo analytics dashboard login '
+         'inventory newsletter chat gallery membership api integration redesign migration').split()
+
+QUERIES = ['chen', 'maria garcia', 'stripe checkout', 'shop', 'dash', 'tanaka web app',
+           'client123', 'mig', 'kofi mensah newsletter', 'zzz']
+
+
+def make_documents(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield i, ' '.join([
+            f'{first} {last}', f'client{i}@example.com', rng.choice(PROJECT_TYPES),
+            ' '.join(rng.sample(WORDS, 4)), 'pending payment'
+        ])
+
+
+def time_queries(search, repeat):
+    samples = {query: [] for query in QUERIES}
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            samples[query].append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, build_seconds, samples):
+    print(f"{name}: built in {build_seconds:.1f}s")
+    for query, values in samples.items():
+        print(f"  {query!r:<28} p50={percentile(values, 50) * 1000:8.2f}ms "
+              f"p99={percentile(values, 99) * 1000:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    index = InvertedIndex()
+    start = time.perf_counter()
+    for ref, text in make_documents(args.records):
+        index.add('order', ref, text)
+    report('InvertedIndex', time.perf_counter() - start,
+           time_queries(lambda query: index.search(query, limit=args.limit), args.repeat))
+    del index
+
+    directory = tempfile.mkdtemp(prefix='bench_search_')
+    try:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'search.db')}")
+        fts = FTS5Index()
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            fts.create(connection)
+            for ref, text in make_documents(args.records):
+                fts.add('order', ref, text, connection)
+        build_seconds = time.perf_counter() - start
+        with engine.connect() as connection:
+            report('FTS5Index', build_seconds,
+                   time_queries(lambda query: fts.search(query, connection, limit=args.limit), args.repeat))
+        engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Multi-process /api/users reads and writes: stock SQLite versus tuned WAL.
+
+Each worker process loads the app the way a Gunicorn worker would and
+drives it through the test client against one shared database file. Reads
+are GET /api/users?ids=<id>, which always queries the database (GET
+/api/users/<id> would mostly be answered by the user cache), and writes are
+POST /api/users. Run from the project root:
+
+    python -m benchmarks.bench_sqlite --workers 4 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.harness import percentile
+
+# Environment for each configuration; the stock one matches SQLite's own defaults
+CONFIGS = {
+    'rollback journal': {'SQLITE_WAL': '0', 'SQLITE_SYNCHRONOUS': 'FULL',
+                         'SQLITE_CACHE_SIZE_KB': '2000', 'SQLITE_MMAP_SIZE': '0'},
+    'WAL + tuned pragmas': {'SQLITE_WAL': '1'},
+}
+
+
+def _load_app(env, db_path):
+    os.environ.update(env)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from main import app
+    return app
+
+
+def seed(env, db_path, users):
+    app = _load_app(env, db_path)
+    client = app.test_client()
+    for start in range(0, users, 10000):
+        client.post('/api/users/bulk', json=[
+            {'username': f'seed{i}', 'email': f'seed{i}@example.com'}
+            for i in range(start, min(users, start + 10000))
+        ])
+
+
+def worker(env, db_path, index, users, duration, write_ratio, results):
+    app = _load_app(env, db_path)
+    client = app.test_client()
+    rng = random.Random(index)
+    reads, writes, errors = [], [], 0
+    deadline = time.monotonic() + duration
+    n = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            n += 1
+            status = client.post('/api/users', json={
+                'username': f'w{index}_{n}', 'email': f'w{index}_{n}@example.com',
+            }).status_code
+            writes.append(time.perf_counter() - start)
+        else:
+            status = client.get(f'/api/users?ids={rng.randint(1, users)}').status_code
+            reads.append(time.perf_counter() - start)
+        if status >= 500:
+            errors += 1
+    results.put((reads, writes, errors))
+
+
+def run(name, env, args):
+    directory = tempfile.mkdtemp(prefix='bench_sqlite_')
+    db_path = os.path.join(directory, 'app.db')
+    context = multiprocessing.get_context('spawn')  # fresh interpreter per worker, like Gunicorn
+    try:
+        process = context.Process(target=seed, args=(env, db_path, args.users))
+        process.start()
+        process.join()
+
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(env, db_path, i, args.users, args.duration,
+                                                          args.write_ratio, results))
+                     for i in range(args.workers)]
+        for process in processes:
+            process.start()
+        reads, writes, errors = [], [], 0
+        for _ in processes:
+            worker_reads, worker_writes, worker_errors = results.get()
+            reads += worker_reads
+            writes += worker_writes
+            errors += worker_errors
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{name}: {(len(reads) + len(writes)) / args.duration:.0f} req/s, {errors} errors")
+    for label, samples in (('reads', reads), ('writes', writes)):
+        if samples:
+            print(f"  {label:<6} n={len(samples):<7} p50={percentile(samples, 50) * 1000:7.2f}ms "
+                  f"p99={percentile(samples, 99) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=10000, help='users seeded before the run')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    for name, env in CONFIGS.items():
+        run(name, env, args)
+
+
+if __name__ == '__main__':
+    main()
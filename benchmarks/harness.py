@@ -0,0 +1,524 @@
+"""Load-test harness for the API blueprints.
+
+Drives a weighted mix of requests across the user, orders, projects,
+consultation, affiliate and automation routes, then reports throughput and
+p50/p95/p99 latency per route and writes the results as JSON, tagged with
+the current commit, so runs can be compared across commits.
+
+Three targets:
+
+    # in-process through the Flask test client (no network, no server)
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.harness --duration 30
+
+    # a local Gunicorn started by the harness on a scratch database
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.harness --gunicorn 4
+
+    # any server that is already running
+    python -m benchmarks.harness --url http://127.0.0.1:5000
+
+Instead of the synthetic mix, ``--mix capture.jsonl`` cycles through
+recorded requests, one JSON object per line with ``method``, ``path`` and
+an optional ``body``. ``benchmarks.replay`` plays the same format back with
+its original timing.
+
+Compare against an earlier run with ``--compare benchmarks/results/<file>.json``.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Path segments that identify a record rather than a route
+ID_SEGMENT_RE = re.compile(r'^(\d+|[A-Z]+_[0-9a-f]{8,}|[0-9a-f-]{16,})$')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn, calls):
+    """Call ``fn(*args)`` for each args tuple in ``calls``; latencies in microseconds"""
+    samples = []
+    for args in calls:
+        start = time.perf_counter_ns()
+        fn(*args)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return samples
+
+
+def route_label(method, path):
+    """``GET /api/orders/17?x=1`` -> ``GET /api/orders/<id>``"""
+    path = path.split('?', 1)[0]
+    segments = ['<id>' if ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/')]
+    return f"{method} {'/'.join(segments)}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Targets ────────────────────────────────────────────────────────────────────
+class InProcessTarget:
+    """Calls the app through the Flask test client, one client per thread"""
+
+    name = 'inprocess'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPTarget:
+    """Calls a running server over keep-alive HTTP connections, one per thread"""
+
+    name = 'http'
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        document = None
+        if data and response.getheader('Content-Type', '').startswith('application/json'):
+            document = json.loads(data)
+        return response.status, document
+
+
+def start_gunicorn(workers, port):
+    """Start ``gunicorn main:app`` and wait until /api/health answers"""
+    # A file rather than a pipe: nothing reads gunicorn's log while the run
+    # is going, and a full pipe would block its workers
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'main:app'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=log,
+    )
+    target = HTTPTarget(f'http://127.0.0.1:{port}')
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            sys.exit(f'gunicorn exited: {log.read().decode(errors="replace")[-2000:]}')
+        try:
+            if target.request('GET', '/api/health')[0] == 200:
+                return process, target
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    sys.exit('gunicorn did not become healthy within 30s')
+
+
+# ── Recording ──────────────────────────────────────────────────────────────────
+class Recorder:
+    def __init__(self):
+        self.samples = []  # (route, status, seconds); list.append is atomic
+        self.recording = True
+
+    def call(self, target, route, method, path, body=None):
+        """Send one request, record its latency and return ``(status, json)``"""
+        start = time.perf_counter()
+        try:
+            status, document = target.request(method, path, body)
+        except Exception:
+            status, document = 0, None  # transport failure
+        if self.recording:
+            self.samples.append((route, status, time.perf_counter() - start))
+        return status, document
+
+
+def summarize(samples, elapsed):
+    def stats(latencies, errors):
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_ms': round(max(latencies) * 1000, 3),
+        }
+
+    by_route = {}
+    for route, status, seconds in samples:
+        by_route.setdefault(route, []).append((status, seconds))
+    routes = {}
+    for route, calls in sorted(by_route.items()):
+        statuses = {}
+        for status, _ in calls:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for status, _ in calls if status == 0 or status >= 500)
+        routes[route] = dict(stats([seconds for _, seconds in calls], errors), statuses=statuses)
+    overall = stats([seconds for _, _, seconds in samples],
+                    sum(1 for _, status, _ in samples if status == 0 or status >= 500)) if samples else {}
+    return overall, routes
+
+
+def print_report(overall, routes):
+    print(f"{'route':<58} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5}")
+    for route, row in routes.items():
+        print(f"{route:<58} {row['requests']:>7} {row['throughput_rps']:>8} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['errors']:>5}")
+    if overall:
+        print(f"{'overall':<58} {overall['requests']:>7} {overall['throughput_rps']:>8} {overall['p50_ms']:>9} "
+              f"{overall['p95_ms']:>9} {overall['p99_ms']:>9} {overall['errors']:>5}")
+
+
+def print_comparison(baseline, routes):
+    print(f"\nvs {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')})")
+    for route, row in routes.items():
+        before = baseline.get('routes', {}).get(route)
+        if not before:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p99_ms', 'throughput_rps'):
+            if before[key]:
+                changes.append(f"{key} {100 * (row[key] - before[key]) / before[key]:+.1f}%")
+        print(f"{route:<58} {'  '.join(changes)}")
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    print(f'\nresults written to {path}')
+
+
+# ── Request mixes ──────────────────────────────────────────────────────────────
+class SyntheticMix:
+    """Weighted operations over every blueprint; creates feed later reads"""
+
+    def __init__(self):
+        self.users = []
+        self.orders = []
+        self.projects = []
+        self.consultations = []
+        self.affiliate_codes = ['JOHN2025', 'SARAH15']
+        self.operations = [
+            (2, self.list_users), (1, self.create_user), (2, self.get_user),
+            (10, self.packages), (3, self.create_order), (5, self.get_order),
+            (3, self.list_orders), (1, self.update_order_status),
+            (3, self.list_projects), (1, self.create_project),
+            (5, self.developers), (3, self.free_slots), (3, self.availability),
+            (1, self.book), (1, self.get_consultation),
+            (8, self.validate_code), (2, self.dashboard), (2, self.leaderboard), (1, self.track_referral),
+            (2, self.assign_freelancer), (2, self.freelancers), (1, self.quality_check),
+            (1, self.health), (2, self.portfolio),
+        ]
+        self._weights = [weight for weight, _ in self.operations]
+        self._functions = [function for _, function in self.operations]
+
+    def run_one(self, call, rng):
+        rng.choices(self._functions, self._weights)[0](call, rng)
+
+    def _remember(self, ids, document, *keys):
+        for key in keys:
+            document = (document or {}).get(key) if isinstance(document, dict) else None
+        if document is not None:
+            ids.append(document)
+
+    # user
+    def list_users(self, call, rng):
+        call('GET /api/users', 'GET', '/api/users')
+
+    def create_user(self, call, rng):
+        n = rng.getrandbits(48)
+        status, document = call('POST /api/users', 'POST', '/api/users',
+                                {'username': f'bench{n}', 'email': f'bench{n}@example.com'})
+        self._remember(self.users, document, 'id')
+
+    def get_user(self, call, rng):
+        if self.users:
+            call('GET /api/users/<id>', 'GET', f'/api/users/{rng.choice(self.users)}')
+
+    # orders
+    def packages(self, call, rng):
+        call('GET /api/packages', 'GET', '/api/packages')
+
+    def create_order(self, call, rng):
+        n = rng.randrange(100000)
+        status, document = call('POST /api/orders', 'POST', '/api/orders', {
+            'client_name': f'Client {n}', 'client_email': f'client{n}@example.com',
+            'package': 'Professional', 'project_type': 'Website', 'price': 599,
+        })
+        self._remember(self.orders, document, 'order', 'id')
+
+    def get_order(self, call, rng):
+        if self.orders:
+            call('GET /api/orders/<id>', 'GET', f'/api/orders/{rng.choice(self.orders)}')
+
+    def list_orders(self, call, rng):
+        call('GET /api/orders?limit=', 'GET', '/api/orders?limit=50')
+
+    def update_order_status(self, call, rng):
+        if self.orders:
+            call('PUT /api/orders/<id>/status', 'PUT', f'/api/orders/{rng.choice(self.orders)}/status',
+                 {'status': rng.choice(['Paid', 'In Progress', 'Completed'])})
+
+    # projects
+    def list_projects(self, call, rng):
+        call('GET /api/projects?limit=', 'GET', '/api/projects?limit=50')
+
+    def create_project(self, call, rng):
+        status, document = call('POST /api/projects', 'POST', '/api/projects', {
+            'client_name': 'Bench Client', 'project_type': 'E-commerce', 'deadline': '2025-12-01', 'price': 999,
+        })
+        self._remember(self.projects, document, 'project', 'id')
+
+    # consultation
+    def developers(self, call, rng):
+        call('GET /api/developers', 'GET', '/api/developers')
+
+    def free_slots(self, call, rng):
+        call('GET /api/developers/free-slots', 'GET', '/api/developers/free-slots?limit=20')
+
+    def availability(self, call, rng):
+        call('GET /api/developers/<id>/availability', 'GET', f'/api/developers/{rng.randint(1, 3)}/availability')
+
+    def book(self, call, rng):
+        n = rng.randrange(100000)
+        status, document = call('POST /api/book', 'POST', '/api/book', {
+            'package': 'basic', 'developer': rng.randint(1, 3),
+            'date': rng.choice(['2025-01-20', '2025-01-21', '2025-01-22']),
+            'time': rng.choice(['09:00', '10:00', '11:00', '14:00']),
+            'client': {'name': f'Client {n}', 'email': f'client{n}@example.com'},
+        })
+        self._remember(self.consultations, document, 'consultation_id')
+
+    def get_consultation(self, call, rng):
+        if self.consultations:
+            call('GET /api/consultations/<id>', 'GET', f'/api/consultations/{rng.choice(self.consultations)}')
+
+    # affiliate
+    def validate_code(self, call, rng):
+        code = rng.choice(self.affiliate_codes + ['NOPE'])
+        call('GET /api/affiliate/validate-code/<code>', 'GET', f'/api/affiliate/validate-code/{code}')
+
+    def dashboard(self, call, rng):
+        code = rng.choice(self.affiliate_codes)
+        call('GET /api/affiliate/dashboard/<code>', 'GET', f'/api/affiliate/dashboard/{code}')
+
+    def leaderboard(self, call, rng):
+        period = rng.choice(['all', 'week', 'month'])
+        call('GET /api/affiliate/leaderboard', 'GET', f'/api/affiliate/leaderboard?period={period}')
+
+    def track_referral(self, call, rng):
+        call('POST /api/affiliate/track-referral', 'POST', '/api/affiliate/track-referral', {
+            'affiliate_code': rng.choice(self.affiliate_codes),
+            'customer_email': f'customer{rng.getrandbits(48)}@example.com', 'order_value': 599,
+        })
+
+    # automation
+    def assign_freelancer(self, call, rng):
+        call('POST /api/automation/assign-freelancer', 'POST', '/api/automation/assign-freelancer', {
+            'project_type': rng.choice(['E-commerce', 'Website', 'Mobile App']),
+            'budget': rng.choice([500, 1000, 3000]), 'client_email': 'client@example.com',
+        })
+
+    def freelancers(self, call, rng):
+        call('GET /api/automation/freelancers', 'GET', '/api/automation/freelancers')
+
+    def quality_check(self, call, rng):
+        call('POST /api/automation/quality-check', 'POST', '/api/automation/quality-check', {
+            'project_id': 1, 'deliverable_url': 'https://example.com/build.zip', 'project_type': 'Website',
+        })
+
+    # main
+    def health(self, call, rng):
+        call('GET /api/health', 'GET', '/api/health')
+
+    def portfolio(self, call, rng):
+        call('GET /api/portfolio', 'GET', '/api/portfolio')
+
+
+class RecordedMix:
+    """Cycles through captured requests in random order"""
+
+    def __init__(self, path):
+        self.records = []
+        self.skipped = 0
+        with open(path) as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                # Malformed lines are skipped, as replay.read_capture does
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.skipped += 1
+                    continue
+                if (isinstance(record, dict) and isinstance(record.get('method'), str)
+                        and isinstance(record.get('path'), str)):
+                    self.records.append(record)
+                else:
+                    self.skipped += 1
+        if not self.records:
+            sys.exit(f'{path} has no records with "method" and "path"')
+        if self.skipped:
+            print(f'{path}: skipped {self.skipped} malformed line(s)', file=sys.stderr)
+
+    def run_one(self, call, rng):
+        record = rng.choice(self.records)
+        method = record['method'].upper()
+        call(route_label(method, record['path']), method, record['path'], record.get('body'))
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+def run(target, mix, concurrency, duration, requests, warmup, seed):
+    """Run ``mix`` from ``concurrency`` threads; returns (samples, elapsed seconds)"""
+    recorder = Recorder()
+    stop = threading.Event()
+    remaining = [requests]
+    remaining_lock = threading.Lock()
+
+    def take():
+        if requests is None:
+            return not stop.is_set()
+        with remaining_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        call = lambda route, method, path, body=None: recorder.call(target, route, method, path, body)
+        while take():
+            mix.run_one(call, rng)
+
+    if warmup:
+        recorder.recording = False
+        warm_rng = random.Random(seed - 1)
+        warm_call = lambda route, method, path, body=None: recorder.call(target, route, method, path, body)
+        deadline = time.monotonic() + warmup
+        while time.monotonic() < deadline:
+            mix.run_one(warm_call, warm_rng)
+        recorder.recording = True
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if requests is None:
+        stop.wait(duration)
+        stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder.samples, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument('--url', help='benchmark a server that is already running')
+    target_group.add_argument('--gunicorn', type=int, metavar='WORKERS', help='start a local Gunicorn')
+    parser.add_argument('--port', type=int, default=8765, help='port for --gunicorn')
+    parser.add_argument('--mix', help='JSONL capture to sample requests from instead of the synthetic mix')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, help='stop after this many operations instead')
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds of unrecorded warm-up')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default benchmarks/results/<commit>-<target>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    if not args.url and not os.environ.get('DATABASE_URL'):
+        sys.exit('Set DATABASE_URL to a scratch database first; the mix creates records')
+
+    server = None
+    if args.url:
+        target = HTTPTarget(args.url)
+    elif args.gunicorn:
+        server, target = start_gunicorn(args.gunicorn, args.port)
+        target.name = 'gunicorn'
+    else:
+        sys.path.insert(0, ROOT)
+        from main import app
+        from src.services.mailer import MemoryTransport, mailer
+        mailer.transport = MemoryTransport()
+        target = InProcessTarget(app)
+
+    mix = RecordedMix(args.mix) if args.mix else SyntheticMix()
+    try:
+        samples, elapsed = run(target, mix, args.concurrency, args.duration, args.requests,
+                               args.warmup, args.seed)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    overall, routes = summarize(samples, elapsed)
+    print_report(overall, routes)
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'target': target.name,
+        'mix': args.mix or 'synthetic',
+        'concurrency': args.concurrency,
+        'python': platform.python_version(),
+        'elapsed_s': round(elapsed, 3),
+        'overall': overall,
+        'routes': routes,
+    }
+    if args.compare:
+        with open(args.compare) as handle:
+            print_comparison(json.load(handle), routes)
+    output = args.output or os.path.join(RESULTS_DIR, f"{(commit or 'nocommit')[:12]}-{target.name}.json")
+    write_results(output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Replay captured API traffic with its original timing.
+
+The capture is JSONL, read lazily, one request per line:
+
+    {"ts": 1718000000.25, "session": "s1", "method": "POST", "path": "/api/orders",
+     "body": {...}, "status": 201, "response": {"order": {"id": 17, ...}}}
+
+``ts`` (epoch seconds or ISO 8601), ``session``, ``body``, ``status`` and
+``response`` are optional. Lines without a string ``method`` and ``path``, or
+with a ``ts`` that is not a time, are skipped, so a JSONL file of anything
+else replays nothing rather than failing.
+
+IDs are rewritten so chains such as create order -> get order -> update
+status hit the records created during the replay. The ``id`` and ``*_id``
+fields of a recorded response are paired with the same fields of the live
+response. Later paths and request bodies that mention a recorded id get the
+live one. A request that depends on an id still being created waits for
+that request to finish. Requests sharing a ``session`` run in capture
+order; everything else runs concurrently.
+
+    DATABASE_URL=sqlite:////tmp/replay.db python -m benchmarks.replay capture.jsonl --speed 4
+    python -m benchmarks.replay capture.jsonl --url http://127.0.0.1:5000 --speed 0
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from benchmarks.harness import (
+    ID_SEGMENT_RE, ROOT, HTTPTarget, InProcessTarget, Recorder, git_commit, percentile,
+    print_report, route_label, summarize, write_results,
+)
+
+
+def read_capture(path, stats):
+    """Yield replayable records from ``path`` one line at a time"""
+    with open(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                stats['skipped'] += 1
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get('method'), str) \
+                    or not isinstance(record.get('path'), str):
+                stats['skipped'] += 1
+                continue
+            try:
+                record['ts'] = _timestamp(record.get('ts'))
+            except ValueError:
+                stats['skipped'] += 1
+                continue
+            yield record
+
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def _is_id_key(key):
+    return key == 'id' or key.endswith('_id')
+
+
+def _plural(name):
+    return name if name.endswith('s') else name + 's'
+
+
+def _id_key(resource, value):
+    """Numeric ids only mean something within their resource; prefixed ids are unique"""
+    value = str(value)
+    return f'{resource}:{value}' if value.isdigit() else value
+
+
+def _response_ids(document, request_path, found=None, path=()):
+    """``{position: (id key, value)}`` for every id-like field in a response"""
+    if found is None:
+        found = {}
+    if isinstance(document, dict):
+        for child_key, value in document.items():
+            _response_ids(value, request_path, found, path + (child_key,))
+    elif isinstance(document, list):
+        for index, value in enumerate(document):
+            _response_ids(value, request_path, found, path + (index,))
+    elif path and isinstance(path[-1], str) and _is_id_key(path[-1]) \
+            and isinstance(document, (int, str)) and not isinstance(document, bool):
+        name = path[-1]
+        if name != 'id':
+            resource = _plural(name[:-3])                     # order_id -> orders
+        else:
+            parents = [part for part in path[:-1] if isinstance(part, str)]
+            if parents:
+                resource = _plural(parents[-1])               # {"order": {"id": ...}}
+            else:
+                segments = [seg for seg in request_path.split('?', 1)[0].split('/') if seg]
+                resource = segments[-1] if segments else ''   # POST /api/users -> {"id": ...}
+        found[path] = (_id_key(resource, document), document)
+    return found
+
+
+class IdMap:
+    """Recorded id -> live id, with waiting for ids that are still being created"""
+
+    def __init__(self):
+        self._live = {}
+        self._pending = {}  # recorded id key -> Event set once its creator finishes
+        self._lock = threading.Lock()
+        self.unresolved = 0
+
+    def expect(self, record):
+        """Register the ids a record will create; returns the Events to set afterwards"""
+        if record['method'].upper() == 'GET' or not isinstance(record.get('response'), (dict, list)):
+            return []
+        events = []
+        with self._lock:
+            for key, _ in _response_ids(record['response'], record['path']).values():
+                if key not in self._live and key not in self._pending:
+                    event = self._pending[key] = threading.Event()
+                    events.append((key, event))
+        return events
+
+    def learn(self, record, live, events):
+        pairs = {}
+        recorded = record.get('response')
+        if isinstance(recorded, (dict, list)) and isinstance(live, (dict, list)):
+            live_ids = _response_ids(live, record['path'])
+            for position, (key, value) in _response_ids(recorded, record['path']).items():
+                if position in live_ids:
+                    # Unchanged ids are kept too, so later requests don't wait for them
+                    pairs[key] = live_ids[position][1]
+        with self._lock:
+            self._live.update(pairs)
+            for key, _ in events:
+                self._pending.pop(key, None)
+        for _, event in events:
+            event.set()
+
+    def _lookup(self, key, owned):
+        with self._lock:
+            if key in self._live:
+                return self._live[key]
+            event = self._pending.get(key)
+        # Ids the current request creates itself are not known until it returns
+        if event is None or event in owned:
+            return None
+        event.wait()
+        with self._lock:
+            if key in self._live:
+                return self._live[key]
+        self.unresolved += 1  # the creating request failed
+        return None
+
+    def rewrite_path(self, path, owned=()):
+        """``owned`` holds the Events of the request being rewritten, which it must not wait on"""
+        path, _, query = path.partition('?')
+        segments = path.split('/')
+        for index, segment in enumerate(segments):
+            if index and ID_SEGMENT_RE.match(segment):
+                live = self._lookup(_id_key(segments[index - 1], segment), owned)
+                if live is not None:
+                    segments[index] = str(live)
+        path = '/'.join(segments)
+        return f'{path}?{query}' if query else path
+
+    def rewrite_body(self, body, key=None, owned=()):
+        if isinstance(body, dict):
+            return {child_key: self.rewrite_body(value, child_key, owned) for child_key, value in body.items()}
+        if isinstance(body, list):
+            return [self.rewrite_body(value, key, owned) for value in body]
+        if key is not None and key.endswith('_id') and isinstance(body, (int, str)) \
+                and not isinstance(body, bool):
+            live = self._lookup(_id_key(_plural(key[:-3]), body), owned)
+            if live is not None:
+                return str(live) if isinstance(body, str) else int(live)
+        return body
+
+
+def replay(target, records, concurrency, speed):
+    """Replay ``records``; returns (samples, elapsed seconds, schedule lag samples, id map)"""
+    recorder = Recorder()
+    ids = IdMap()
+    lag = []
+    sessions = {}  # session -> future of its latest request
+    in_flight = threading.BoundedSemaphore(concurrency * 4)  # keeps reading lazy
+
+    def send(record, events, previous):
+        try:
+            if previous is not None:
+                wait([previous])  # keep the session in capture order
+            method = record['method'].upper()
+            owned = [event for _, event in events]
+            path = ids.rewrite_path(record['path'], owned)
+            body = ids.rewrite_body(record.get('body'), owned=owned)
+            status, document = recorder.call(target, route_label(method, record['path']), method, path, body)
+            ids.learn(record, document, events)
+        finally:
+            for _, event in events:
+                event.set()
+            in_flight.release()
+
+    started = time.perf_counter()
+    first_ts = None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if speed and record['ts'] is not None:
+                if first_ts is None:
+                    first_ts = record['ts']
+                due = started + (record['ts'] - first_ts) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                lag.append(max(0.0, -delay))
+            in_flight.acquire()
+            events = ids.expect(record)
+            session = record.get('session')
+            future = pool.submit(send, record, events, sessions.get(session) if session is not None else None)
+            if session is not None:
+                sessions[session] = future
+    return recorder.samples, time.perf_counter() - started, lag, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture', help='JSONL capture to replay')
+    parser.add_argument('--url', help='replay against a running server instead of in-process')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='multiple of the recorded rate; 0 sends as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    if args.url:
+        target = HTTPTarget(args.url)
+    else:
+        if not os.environ.get('DATABASE_URL'):
+            sys.exit('Set DATABASE_URL to a scratch database first; replayed writes are real')
+        sys.path.insert(0, ROOT)
+        from main import app
+        from src.services.mailer import MemoryTransport, mailer
+        mailer.transport = MemoryTransport()
+        target = InProcessTarget(app)
+
+    stats = {'skipped': 0}
+    samples, elapsed, lag, ids = replay(target, read_capture(args.capture, stats),
+                                        args.concurrency, args.speed)
+    if not samples:
+        sys.exit(f"{args.capture}: nothing to replay ({stats['skipped']} malformed lines)")
+
+    overall, routes = summarize(samples, elapsed)
+    print_report(overall, routes)
+    print(f"\nskipped lines: {stats['skipped']}  unresolved ids: {ids.unresolved}")
+    if lag:
+        print(f"schedule lag: p50 {percentile(lag, 50) * 1000:.1f}ms p99 {percentile(lag, 99) * 1000:.1f}ms "
+              f"(raise --concurrency if this grows)")
+
+    if args.output:
+        write_results(args.output, {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'target': target.name,
+            'capture': args.capture,
+            'speed': args.speed,
+            'concurrency': args.concurrency,
+            'elapsed_s': round(elapsed, 3),
+            'skipped': stats['skipped'],
+            'unresolved_ids': ids.unresolved,
+            'overall': overall,
+            'routes': routes,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Concurrent-write stress test for the order, booking and referral endpoints.
+
+Fires thousands of POSTs from a thread pool at the app through the Flask
+test client and then checks the database for lost writes and duplicates.
+Point DATABASE_URL at a scratch database; the script refuses to run against
+the default one:
+
+    DATABASE_URL=sqlite:////tmp/stress.db python -m benchmarks.stress_concurrency
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='POSTs per endpoint')
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        sys.exit('Set DATABASE_URL to a scratch database first')
+
+    from main import app
+    from src.models.user import db
+    from src.models.affiliate import Affiliate
+    from src.models.consultation import SlotReservation
+    from src.models.order import Order
+    from src.routes.consultation import developers
+    from src.services.mailer import MemoryTransport, mailer
+
+    mailer.transport = MemoryTransport()
+
+    with app.app_context():
+        before_orders = db.session.query(Order.id).count()
+        before = db.session.get(Affiliate, 1)
+        before_referrals, before_pending = before.total_referrals, before.pending_commission
+
+    slots = [(d['id'], date, time) for d in developers
+             for date in d['availability'] for time in d['time_slots']]
+
+    def create_order(i):
+        return app.test_client().post('/api/orders', json={
+            'client_name': f'Client {i}', 'client_email': f'client{i}@example.com',
+            'package': 'Starter', 'price': 299,
+        }).status_code
+
+    def book(i):
+        developer_id, date, time = slots[i % len(slots)]
+        return app.test_client().post('/api/book', json={
+            'package': 'basic', 'developer': developer_id, 'date': date, 'time': time,
+            'client': {'name': f'Client {i}', 'email': f'client{i}@example.com'},
+        }).status_code
+
+    def track_referral(i):
+        return app.test_client().post('/api/affiliate/track-referral', json={
+            'affiliate_code': 'JOHN2025', 'customer_email': f'customer{i}@example.com',
+            'order_value': 100,
+        }).status_code
+
+    calls = [(fn, i) for i in range(args.requests) for fn in (create_order, book, track_referral)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        statuses = list(pool.map(lambda call: (call[0].__name__, call[0](call[1])), calls))
+    elapsed = time.perf_counter() - started
+
+    counts = Counter(statuses)
+    print(f"{len(calls)} requests in {elapsed:.2f}s ({len(calls) / elapsed:.0f} req/s)")
+    for (name, status), count in sorted(counts.items()):
+        print(f"  {name:<15} {status} x {count}")
+
+    failures = []
+    with app.app_context():
+        orders = db.session.query(Order.id).count() - before_orders
+        if orders != counts[('create_order', 201)]:
+            failures.append(f'orders: {orders} rows for {counts[("create_order", 201)]} successful POSTs')
+
+        reservations = db.session.query(SlotReservation.developer_id, SlotReservation.date,
+                                        SlotReservation.time).all()
+        duplicates = [slot for slot, n in Counter(reservations).items() if n > 1]
+        if duplicates or counts[('book', 200)] > len(slots):
+            failures.append(f'bookings: {counts[("book", 200)]} accepted for {len(slots)} slots')
+
+        affiliate = db.session.get(Affiliate, 1)
+        tracked = counts[('track_referral', 200)]
+        if affiliate.total_referrals - before_referrals != tracked:
+            failures.append(f'referrals: counter moved by {affiliate.total_referrals - before_referrals}, '
+                            f'{tracked} tracked')
+        if abs(affiliate.pending_commission - before_pending - tracked * 15.0) > 1e-6:
+            failures.append('referrals: pending commission does not match tracked referrals')
+
+    for failure in failures:
+        print('FAIL', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
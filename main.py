@@ -2,7 +2,7 @@ import os
 import sys
 import pathlib
 import datetime
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 
 # ── Make sure our internal packages resolve ────────────────────────────────────
@@ -11,10 +11,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from src.models.user import db
 from src.routes.user   import user_bp
-# (add other blueprints when they’re ready)
-# from src.routes.orders import orders_bp
-# from src.routes.projects import projects_bp
-# …
+from src.routes.orders import orders_bp
+from src.routes.projects import projects_bp, seed_demo_data as seed_projects
+from src.routes.consultation import consultation_bp
+from src.routes.affiliate import affiliate_bp, seed_demo_data as seed_affiliates
+from src.routes.automation import automation_bp
+from src.routes.search import configure_search, search_bp
+from src.utils.ids import new_id
+from src.services.mailer import mailer
+from src.utils.json_provider import FastJSONProvider
+from src.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from src.utils.response_cache import CachedJSON
+from src.utils.database import configure_engine, create_schema, database_url, engine_options
+from src.utils.static_files import StaticFiles
 
 # ── Flask app & config ─────────────────────────────────────────────────────────
 app = Flask(
@@ -23,23 +32,108 @@ app = Flask(
 )
 app.config["SECRET_KEY"] = "handleserv#2024$secure"
 
+# orjson-backed jsonify/get_json when available, stdlib json otherwise
+app.json = FastJSONProvider(app)
+
 # CORS: allow any origin (tighten later if you like)
 CORS(app, origins="*")
 
-app.register_blueprint(user_bp, url_prefix="/api")
-# app.register_blueprint(orders_bp,   url_prefix="/api")
-# app.register_blueprint(projects_bp, url_prefix="/api")
+# Per-route latency, sizes and status counts, scraped from /api/metrics
+metrics.init_app(app)
+metrics.register_stats("mailer", mailer.stats)
+
+app.register_blueprint(user_bp,         url_prefix="/api")
+app.register_blueprint(orders_bp,       url_prefix="/api")
+app.register_blueprint(projects_bp,     url_prefix="/api")
+app.register_blueprint(consultation_bp, url_prefix="/api")
+app.register_blueprint(affiliate_bp,    url_prefix="/api")
+app.register_blueprint(automation_bp,   url_prefix="/api")
+app.register_blueprint(search_bp,       url_prefix="/api")
 
-# ── Database (SQLite for demo) ─────────────────────────────────────────────────
+# ── Database (SQLite unless DATABASE_URL says otherwise) ──────────────────────
 BASE_DIR = pathlib.Path(__file__).resolve().parent          # /opt/render/project/src
 DB_DIR   = BASE_DIR / "database"
 DB_DIR.mkdir(exist_ok=True)                                 # make .../database if missing
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_DIR / 'app.db'}"
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url(f"sqlite:///{DB_DIR / 'app.db'}")
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    # SQLite files run in WAL mode with tuned pragmas (SQLITE_WAL=0 to opt out)
+    wal_checkpointer = configure_engine(db.engine)
+    if wal_checkpointer:
+        metrics.register_stats("sqlite_wal", wal_checkpointer.stats)
+    # Safe with several workers booting at once; the demo seeds insert once
+    create_schema(db)
+    seed_projects()
+    seed_affiliates()
+    # In-memory search index unless SEARCH_BACKEND=fts5 (SQLite only)
+    configure_search(db.engine)
+
+# ── Static catalogs (encoded once, served with ETags) ─────────────────────────
+CATALOG_DEVELOPERS = [
+    {
+        "id": 1,
+        "name": "Sarah Johnson",
+        "specialty": "Business Websites & E-commerce",
+        "experience": "5+ years",
+        "rating": 4.9,
+        "projects": 150,
+        "price": "$100",
+        "available": True,
+    },
+    {
+        "id": 2,
+        "name": "Mike Chen",
+        "specialty": "Custom Web Applications",
+        "experience": "7+ years",
+        "rating": 4.8,
+        "projects": 200,
+        "price": "$100",
+        "available": True,
+    },
+    {
+        "id": 3,
+        "name": "Lisa Rodriguez",
+        "specialty": "UI/UX Design & Development",
+        "experience": "6+ years",
+        "rating": 4.9,
+        "projects": 180,
+        "price": "$100",
+        "available": True,
+    },
+]
+
+PORTFOLIO_ITEMS = [
+    {
+        "id": 1,
+        "title": "TechStart Inc.",
+        "category": "Business Website",
+        "description": "Modern corporate website with advanced features",
+        "technologies": ["React", "Node.js", "MongoDB"],
+        "results": "40% increase in leads",
+    },
+    {
+        "id": 2,
+        "title": "Urban Fashion",
+        "category": "E-commerce Store",
+        "description": "Complete online store with payment integration",
+        "technologies": ["Shopify", "React", "Stripe"],
+        "results": "300% sales growth",
+    },
+    {
+        "id": 3,
+        "title": "GrowthCo Marketing",
+        "category": "Landing Page",
+        "description": "High-converting landing page for marketing agency",
+        "technologies": ["Next.js", "Tailwind", "Analytics"],
+        "results": "85% conversion rate",
+    },
+]
+
+developers_response = CachedJSON({"developers": CATALOG_DEVELOPERS})
+portfolio_response  = CachedJSON({"portfolio": PORTFOLIO_ITEMS})
 
 # ── API routes ────────────────────────────────────────────────────────────────
 # Video Consultation
@@ -52,7 +146,7 @@ def consultation_request():
     if missing:
         return jsonify({"error": f"{', '.join(missing)} required"}), 400
 
-    consultation_id = f"CONS_{datetime.datetime.now():%Y%m%d_%H%M%S}"
+    consultation_id = new_id("CONS")
     consultation    = {
         "id": consultation_id,
         "name": data["name"],
@@ -81,39 +175,7 @@ def consultation_request():
 # Developers list
 @app.get("/api/consultation/developers")
 def get_developers():
-    developers = [
-        {
-            "id": 1,
-            "name": "Sarah Johnson",
-            "specialty": "Business Websites & E-commerce",
-            "experience": "5+ years",
-            "rating": 4.9,
-            "projects": 150,
-            "price": "$100",
-            "available": True,
-        },
-        {
-            "id": 2,
-            "name": "Mike Chen",
-            "specialty": "Custom Web Applications",
-            "experience": "7+ years",
-            "rating": 4.8,
-            "projects": 200,
-            "price": "$100",
-            "available": True,
-        },
-        {
-            "id": 3,
-            "name": "Lisa Rodriguez",
-            "specialty": "UI/UX Design & Development",
-            "experience": "6+ years",
-            "rating": 4.9,
-            "projects": 180,
-            "price": "$100",
-            "available": True,
-        },
-    ]
-    return jsonify({"developers": developers}), 200
+    return developers_response.response()
 
 
 # Contact form
@@ -126,7 +188,7 @@ def contact_form():
     if missing:
         return jsonify({"error": f"{', '.join(missing)} required"}), 400
 
-    message_id = f"MSG_{datetime.datetime.now():%Y%m%d_%H%M%S}"
+    message_id = new_id("MSG")
     # In production, save to DB here
     return (
         jsonify(
@@ -143,33 +205,7 @@ def contact_form():
 # Portfolio
 @app.get("/api/portfolio")
 def get_portfolio():
-    portfolio_items = [
-        {
-            "id": 1,
-            "title": "TechStart Inc.",
-            "category": "Business Website",
-            "description": "Modern corporate website with advanced features",
-            "technologies": ["React", "Node.js", "MongoDB"],
-            "results": "40% increase in leads",
-        },
-        {
-            "id": 2,
-            "title": "Urban Fashion",
-            "category": "E-commerce Store",
-            "description": "Complete online store with payment integration",
-            "technologies": ["Shopify", "React", "Stripe"],
-            "results": "300% sales growth",
-        },
-        {
-            "id": 3,
-            "title": "GrowthCo Marketing",
-            "category": "Landing Page",
-            "description": "High-converting landing page for marketing agency",
-            "technologies": ["Next.js", "Tailwind", "Analytics"],
-            "results": "85% conversion rate",
-        },
-    ]
-    return jsonify({"portfolio": portfolio_items}), 200
+    return portfolio_response.response()
 
 
 # Health check (Render probes this)
@@ -188,22 +224,30 @@ def health_check():
     )
 
 
+@app.get("/api/metrics")
+def get_metrics():
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 # ── Serve React/HTML front-end build from /static ─────────────────────────────
+# Scanned once at startup; set STATIC_WATCH_INTERVAL (seconds) to pick up
+# changes without a restart
+static_files = StaticFiles(
+    app.static_folder,
+    watch_interval=float(os.environ.get("STATIC_WATCH_INTERVAL", 0)) or None,
+)
+
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_static(path):
-    static_root = app.static_folder
-    if not static_root:
+    if not app.static_folder:
         return "Static folder not configured", 404
 
-    file_path = os.path.join(static_root, path)
-    index_path = os.path.join(static_root, "index.html")
-
-    if path and os.path.exists(file_path):
-        return send_from_directory(static_root, path)
-    if os.path.exists(index_path):
-        return send_from_directory(static_root, "index.html")
-    return "index.html not found", 404
+    response = static_files.serve(path)
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 
 # ── Dev server entry­point (ignored by Gunicorn in production) ────────────────
@@ -0,0 +1,63 @@
+from src.models.user import db
+
+
+class Affiliate(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    affiliate_code = db.Column(db.String(40), unique=True)
+    commission_rate = db.Column(db.Float, nullable=False, default=0.15)
+    total_earnings = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    total_referrals = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='active')
+    joined_date = db.Column(db.String(10))
+    # Running aggregates over this affiliate's referrals, kept in step by
+    # the affiliate blueprint so the dashboard never scans referrals
+    referral_count = db.Column(db.Integer, nullable=False, default=0)
+    pending_commission = db.Column(db.Float, nullable=False, default=0.0)
+    paid_commission = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<Affiliate {self.affiliate_code}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'affiliate_code': self.affiliate_code,
+            'commission_rate': self.commission_rate,
+            'total_earnings': self.total_earnings,
+            'total_referrals': self.total_referrals,
+            'status': self.status,
+            'joined_date': self.joined_date
+        }
+
+
+class Referral(db.Model):
+    # Covers the windowed leaderboard: range on date, then group by affiliate
+    __table_args__ = (
+        db.Index('ix_referral_date_affiliate', 'date', 'affiliate_id', 'status', 'commission_earned'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    affiliate_id = db.Column(db.Integer, db.ForeignKey('affiliate.id'), nullable=False, index=True)
+    customer_email = db.Column(db.String(120), nullable=False, index=True)
+    order_value = db.Column(db.Float, nullable=False, default=0.0)
+    commission_earned = db.Column(db.Float, nullable=False, default=0.0)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    date = db.Column(db.String(10))
+
+    def __repr__(self):
+        return f'<Referral {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'affiliate_id': self.affiliate_id,
+            'customer_email': self.customer_email,
+            'order_value': self.order_value,
+            'commission_earned': self.commission_earned,
+            'status': self.status,
+            'date': self.date
+        }
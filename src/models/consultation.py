@@ -0,0 +1,58 @@
+import datetime
+
+from src.models.user import db
+
+
+class Consultation(db.Model):
+    id = db.Column(db.String(64), primary_key=True)
+    package = db.Column(db.String(50), nullable=False)
+    developer_id = db.Column(db.Integer, nullable=False, index=True)
+    developer_name = db.Column(db.String(120))
+    developer_email = db.Column(db.String(120))
+    date = db.Column(db.String(10), nullable=False)
+    time = db.Column(db.String(5), nullable=False)
+    client = db.Column(db.JSON, nullable=False)
+    client_email = db.Column(db.String(120), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='scheduled', index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now, index=True)
+    updated_at = db.Column(db.DateTime)
+    zoom_link = db.Column(db.String(255))
+    calendly_link = db.Column(db.String(255))
+
+    def __repr__(self):
+        return f'<Consultation {self.id}>'
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'package': self.package,
+            'developer_id': self.developer_id,
+            'developer_name': self.developer_name,
+            'developer_email': self.developer_email,
+            'date': self.date,
+            'time': self.time,
+            'client': self.client,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'zoom_link': self.zoom_link,
+            'calendly_link': self.calendly_link
+        }
+        if self.updated_at:
+            data['updated_at'] = self.updated_at.isoformat()
+        return data
+
+
+class SlotReservation(db.Model):
+    """A taken developer slot; the unique key makes reserving a slot atomic"""
+    __table_args__ = (
+        db.UniqueConstraint('developer_id', 'date', 'time', name='uq_slot_reservation'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    developer_id = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.String(10), nullable=False)
+    time = db.Column(db.String(5), nullable=False)
+    consultation_id = db.Column(db.String(64), db.ForeignKey('consultation.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<SlotReservation {self.developer_id} {self.date} {self.time}>'
@@ -0,0 +1,38 @@
+import datetime
+
+from src.models.user import db
+
+
+class Order(db.Model):
+    # client_email leads so the index also serves email-only lookups
+    __table_args__ = (
+        db.Index('ix_order_client_email_status', 'client_email', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    client_name = db.Column(db.String(120))
+    client_email = db.Column(db.String(120))
+    package = db.Column(db.String(50))
+    project_type = db.Column(db.String(100))
+    requirements = db.Column(db.Text)
+    deadline = db.Column(db.String(30))
+    price = db.Column(db.Float)
+    status = db.Column(db.String(30), nullable=False, default='Pending Payment', index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+
+    def __repr__(self):
+        return f'<Order {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'client_name': self.client_name,
+            'client_email': self.client_email,
+            'package': self.package,
+            'project_type': self.project_type,
+            'requirements': self.requirements,
+            'deadline': self.deadline,
+            'price': self.price,
+            'status': self.status,
+            'created_at': self.created_at.isoformat()
+        }
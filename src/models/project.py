@@ -0,0 +1,25 @@
+from src.models.user import db
+
+
+class Project(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    client_name = db.Column(db.String(120))
+    project_type = db.Column(db.String(100))
+    status = db.Column(db.String(30), nullable=False, default='Pending', index=True)
+    deadline = db.Column(db.String(30))
+    freelancer = db.Column(db.String(120))
+    price = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<Project {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'client_name': self.client_name,
+            'project_type': self.project_type,
+            'status': self.status,
+            'deadline': self.deadline,
+            'freelancer': self.freelancer,
+            'price': self.price
+        }
@@ -1,12 +1,23 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
+from src.models.affiliate import Affiliate, Referral
+from sqlalchemy.exc import IntegrityError
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+from src.utils.pagination import ndjson_response, page_args, paginate_query, stream_query, wants_ndjson
 import datetime
-import uuid
 
 affiliate_bp = Blueprint('affiliate', __name__)
 
-# Mock affiliate database
-affiliates = [
+# /affiliate/validate-code runs on every referred page view, so its payload
+# (or None for unknown codes) is cached per code in front of the database.
+# Unknown codes expire sooner because other workers cannot invalidate them.
+validate_code_cache = TTLCache(maxsize=10000, ttl=300)
+INVALID_CODE_TTL = 30
+metrics.register_stats('cache', validate_code_cache.stats, cache='affiliate_code')
+
+# Demo affiliates loaded into an empty database
+DEMO_AFFILIATES = [
     {
         'id': 1,
         'name': 'John Marketing',
@@ -31,8 +42,8 @@ affiliates = [
     }
 ]
 
-# Mock referral tracking
-referrals = [
+# Demo referral tracking
+DEMO_REFERRALS = [
     {
         'id': 1,
         'affiliate_id': 1,
@@ -53,6 +64,88 @@ referrals = [
     }
 ]
 
+REFERRAL_STATUSES = ('pending', 'paid', 'cancelled')
+
+# Number of referrals shown on the dashboard
+RECENT_REFERRALS = 5
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_PERIODS = ('all', 'week', 'month')
+
+def seed_demo_data():
+    """Insert the demo affiliates and referrals when the tables are empty"""
+    if db.session.query(Affiliate.id).first() is None:
+        for data in DEMO_AFFILIATES:
+            own = [r for r in DEMO_REFERRALS if r['affiliate_id'] == data['id']]
+            db.session.add(Affiliate(
+                referral_count=len(own),
+                pending_commission=sum(r['commission_earned'] for r in own if r['status'] == 'pending'),
+                paid_commission=sum(r['commission_earned'] for r in own if r['status'] == 'paid'),
+                **data
+            ))
+        db.session.add_all(Referral(**referral) for referral in DEMO_REFERRALS)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker seeded the same ids first
+            db.session.rollback()
+
+# The aggregate helpers below issue UPDATE ... SET col = col + delta so that
+# concurrent requests (threads or workers) cannot lose each other's updates
+
+def add_referral_to_totals(affiliate_id, status, commission):
+    """Count a new referral in the affiliate's running aggregates"""
+    deltas = {'total_referrals': 1, 'referral_count': 1}
+    _add_commission(deltas, status, commission)
+    _apply_deltas(affiliate_id, deltas)
+
+def change_referral_status(referral, status):
+    """Move a referral's commission between the pending and paid totals
+
+    Returns False when another request changed the status first.
+    """
+    old_status = referral.status
+    if old_status == status:
+        return True
+    # Compare-and-set so two concurrent "mark paid" calls cannot both count
+    result = db.session.execute(
+        db.update(Referral)
+        .where(Referral.id == referral.id, Referral.status == old_status)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    
+    deltas = {}
+    _add_commission(deltas, old_status, -referral.commission_earned)
+    _add_commission(deltas, status, referral.commission_earned)
+    if status == 'paid':
+        deltas['total_earnings'] = referral.commission_earned
+    elif old_status == 'paid':
+        deltas['total_earnings'] = -referral.commission_earned
+    _apply_deltas(referral.affiliate_id, deltas)
+    return True
+
+def _add_commission(deltas, status, amount):
+    column = {'pending': 'pending_commission', 'paid': 'paid_commission'}.get(status)
+    if column:
+        deltas[column] = deltas.get(column, 0) + amount
+
+def _apply_deltas(affiliate_id, deltas):
+    if deltas:
+        db.session.execute(
+            db.update(Affiliate)
+            .where(Affiliate.id == affiliate_id)
+            .values({getattr(Affiliate, column): getattr(Affiliate, column) + delta
+                     for column, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+
+def get_affiliate_by_code(affiliate_code):
+    """Resolve an affiliate through the unique affiliate_code index"""
+    return Affiliate.query.filter_by(affiliate_code=affiliate_code).first()
+
 @affiliate_bp.route('/affiliate/register', methods=['POST'])
 def register_affiliate():
     """Register a new affiliate"""
@@ -68,40 +161,53 @@ def register_affiliate():
         }), 400
     
     # Check if email already exists
-    existing_affiliate = next((a for a in affiliates if a['email'] == email), None)
+    existing_affiliate = Affiliate.query.filter_by(email=email).first()
     if existing_affiliate:
         return jsonify({
             'success': False,
             'message': 'Email already registered as affiliate'
         }), 400
     
-    # Generate unique affiliate code
-    affiliate_code = f"{name.upper().replace(' ', '')[:5]}{len(affiliates) + 1}"
-    
-    new_affiliate = {
-        'id': len(affiliates) + 1,
-        'name': name,
-        'email': email,
-        'affiliate_code': affiliate_code,
-        'commission_rate': 0.15,  # 15% commission
-        'total_earnings': 0.00,
-        'total_referrals': 0,
-        'status': 'active',
-        'joined_date': datetime.datetime.now().strftime('%Y-%m-%d')
-    }
+    new_affiliate = Affiliate(
+        name=name,
+        email=email,
+        commission_rate=0.15,  # 15% commission
+        total_earnings=0.00,
+        total_referrals=0,
+        referral_count=0,
+        pending_commission=0.0,
+        paid_commission=0.0,
+        status='active',
+        joined_date=datetime.datetime.now().strftime('%Y-%m-%d')
+    )
+    db.session.add(new_affiliate)
+    try:
+        db.session.flush()
+        
+        # Generate unique affiliate code from the allocated id
+        new_affiliate.affiliate_code = f"{name.upper().replace(' ', '')[:5]}{new_affiliate.id}"
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent registration claimed the email first
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Email already registered as affiliate'
+        }), 400
     
-    affiliates.append(new_affiliate)
+    # Drop any cached "invalid code" answer for the newly issued code
+    validate_code_cache.invalidate(new_affiliate.affiliate_code)
     
     return jsonify({
         'success': True,
         'message': 'Affiliate registration successful',
-        'affiliate': new_affiliate
+        'affiliate': new_affiliate.to_dict()
     })
 
 @affiliate_bp.route('/affiliate/dashboard/<affiliate_code>', methods=['GET'])
 def get_affiliate_dashboard(affiliate_code):
     """Get affiliate dashboard data"""
-    affiliate = next((a for a in affiliates if a['affiliate_code'] == affiliate_code), None)
+    affiliate = get_affiliate_by_code(affiliate_code)
     
     if not affiliate:
         return jsonify({
@@ -109,24 +215,25 @@ def get_affiliate_dashboard(affiliate_code):
             'message': 'Affiliate not found'
         }), 404
     
-    # Get affiliate's referrals
-    affiliate_referrals = [r for r in referrals if r['affiliate_id'] == affiliate['id']]
+    # Newest referrals first through the affiliate_id index, no full scan
+    recent_referrals = (Referral.query.filter_by(affiliate_id=affiliate.id)
+                        .order_by(Referral.id.desc()).limit(RECENT_REFERRALS).all())
     
-    # Calculate statistics
-    total_clicks = len(affiliate_referrals) * 5  # Mock click data
-    conversion_rate = (len(affiliate_referrals) / max(total_clicks, 1)) * 100
-    pending_earnings = sum(r['commission_earned'] for r in affiliate_referrals if r['status'] == 'pending')
+    # Statistics come from the running aggregates
+    total_clicks = affiliate.referral_count * 5  # Mock click data
+    conversion_rate = (affiliate.referral_count / max(total_clicks, 1)) * 100
     
     dashboard_data = {
-        'affiliate_info': affiliate,
+        'affiliate_info': affiliate.to_dict(),
         'statistics': {
             'total_clicks': total_clicks,
-            'total_referrals': len(affiliate_referrals),
+            'total_referrals': affiliate.referral_count,
             'conversion_rate': round(conversion_rate, 2),
-            'total_earnings': affiliate['total_earnings'],
-            'pending_earnings': pending_earnings
+            'total_earnings': affiliate.total_earnings,
+            'pending_earnings': affiliate.pending_commission,
+            'paid_earnings': affiliate.paid_commission
         },
-        'recent_referrals': affiliate_referrals[-5:],  # Last 5 referrals
+        'recent_referrals': [r.to_dict() for r in reversed(recent_referrals)],  # Last 5 referrals
         'referral_link': f"https://wcugjzce.manus.space?ref={affiliate_code}"
     }
     
@@ -151,7 +258,7 @@ def track_referral():
         }), 400
     
     # Find affiliate
-    affiliate = next((a for a in affiliates if a['affiliate_code'] == affiliate_code), None)
+    affiliate = get_affiliate_by_code(affiliate_code)
     if not affiliate:
         return jsonify({
             'success': False,
@@ -159,36 +266,78 @@ def track_referral():
         }), 404
     
     # Calculate commission
-    commission_earned = order_value * affiliate['commission_rate']
+    commission_earned = order_value * affiliate.commission_rate
     
     # Create new referral record
-    new_referral = {
-        'id': len(referrals) + 1,
-        'affiliate_id': affiliate['id'],
-        'customer_email': customer_email,
-        'order_value': order_value,
-        'commission_earned': commission_earned,
-        'status': 'pending',
-        'date': datetime.datetime.now().strftime('%Y-%m-%d')
-    }
-    
-    referrals.append(new_referral)
+    new_referral = Referral(
+        affiliate_id=affiliate.id,
+        customer_email=customer_email,
+        order_value=order_value,
+        commission_earned=commission_earned,
+        status='pending',
+        date=datetime.datetime.now().strftime('%Y-%m-%d')
+    )
+    db.session.add(new_referral)
     
     # Update affiliate stats
-    affiliate['total_referrals'] += 1
+    add_referral_to_totals(affiliate.id, new_referral.status, commission_earned)
+    db.session.commit()
     
     return jsonify({
         'success': True,
         'message': 'Referral tracked successfully',
-        'referral': new_referral
+        'referral': new_referral.to_dict()
+    })
+
+@affiliate_bp.route('/affiliate/referrals/<int:referral_id>/status', methods=['PUT'])
+def update_referral_status(referral_id):
+    """Update referral status (e.g. mark commission as paid)"""
+    data = request.get_json()
+    status = data.get('status')
+    
+    if status not in REFERRAL_STATUSES:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid status'
+        }), 400
+    
+    referral = db.session.get(Referral, referral_id)
+    if not referral:
+        return jsonify({
+            'success': False,
+            'message': 'Referral not found'
+        }), 404
+    
+    if not change_referral_status(referral, status):
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Referral status was changed by another request, please retry'
+        }), 409
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'message': 'Referral status updated successfully',
+        'referral': referral.to_dict()
     })
 
 @affiliate_bp.route('/affiliate/validate-code/<affiliate_code>', methods=['GET'])
 def validate_affiliate_code(affiliate_code):
     """Validate affiliate code and return affiliate info"""
-    affiliate = next((a for a in affiliates if a['affiliate_code'] == affiliate_code), None)
+    info = validate_code_cache.get(affiliate_code, default=False)
+    if info is False:
+        affiliate = get_affiliate_by_code(affiliate_code)
+        info = None
+        if affiliate:
+            info = {
+                'name': affiliate.name,
+                'code': affiliate.affiliate_code,
+                'commission_rate': affiliate.commission_rate
+            }
+        validate_code_cache.set(affiliate_code, info, ttl=None if info else INVALID_CODE_TTL)
     
-    if not affiliate:
+    if not info:
         return jsonify({
             'success': False,
             'message': 'Invalid affiliate code'
@@ -196,11 +345,15 @@ def validate_affiliate_code(affiliate_code):
     
     return jsonify({
         'success': True,
-        'affiliate': {
-            'name': affiliate['name'],
-            'code': affiliate['affiliate_code'],
-            'commission_rate': affiliate['commission_rate']
-        }
+        'affiliate': info
+    })
+
+@affiliate_bp.route('/affiliate/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss counters for the affiliate code cache"""
+    return jsonify({
+        'success': True,
+        'validate_code_cache': validate_code_cache.stats()
     })
 
 @affiliate_bp.route('/affiliate/generate-links', methods=['POST'])
@@ -209,7 +362,7 @@ def generate_affiliate_links():
     data = request.get_json()
     affiliate_code = data.get('affiliate_code')
     
-    affiliate = next((a for a in affiliates if a['affiliate_code'] == affiliate_code), None)
+    affiliate = get_affiliate_by_code(affiliate_code)
     if not affiliate:
         return jsonify({
             'success': False,
@@ -254,7 +407,7 @@ def generate_affiliate_links():
 @affiliate_bp.route('/affiliate/payment-history/<affiliate_code>', methods=['GET'])
 def get_payment_history(affiliate_code):
     """Get affiliate payment history"""
-    affiliate = next((a for a in affiliates if a['affiliate_code'] == affiliate_code), None)
+    affiliate = get_affiliate_by_code(affiliate_code)
     if not affiliate:
         return jsonify({
             'success': False,
@@ -288,29 +441,91 @@ def get_payment_history(affiliate_code):
 
 @affiliate_bp.route('/affiliate/leaderboard', methods=['GET'])
 def get_affiliate_leaderboard():
-    """Get top performing affiliates"""
-    # Sort affiliates by total earnings
-    top_affiliates = sorted(affiliates, key=lambda x: x['total_earnings'], reverse=True)[:10]
+    """Get top performing affiliates, overall or for this week/month"""
+    period = request.args.get('period', 'all')
+    if period not in LEADERBOARD_PERIODS:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid period'
+        }), 400
+    
+    if period == 'all':
+        # Top 10 straight off the total_earnings index
+        top_affiliates = (Affiliate.query.order_by(Affiliate.total_earnings.desc())
+                          .limit(LEADERBOARD_SIZE).all())
+        rows = [(a.name, a.total_earnings, a.total_referrals) for a in top_affiliates]
+    else:
+        rows = windowed_leaderboard(period_start(period))
     
     leaderboard = []
-    for i, affiliate in enumerate(top_affiliates):
+    for i, (name, total_earnings, total_referrals) in enumerate(rows):
         leaderboard.append({
             'rank': i + 1,
-            'name': affiliate['name'],
-            'total_earnings': affiliate['total_earnings'],
-            'total_referrals': affiliate['total_referrals']
+            'name': name,
+            'total_earnings': total_earnings,
+            'total_referrals': total_referrals
         })
     
     return jsonify({
         'success': True,
+        'period': period,
         'leaderboard': leaderboard
     })
 
+def period_start(period, today=None):
+    """First day (YYYY-MM-DD) of the current week or month"""
+    today = today or datetime.date.today()
+    if period == 'week':
+        start = today - datetime.timedelta(days=today.weekday())
+    else:
+        start = today.replace(day=1)
+    return start.strftime('%Y-%m-%d')
+
+def windowed_leaderboard(since):
+    """Top affiliates by paid commission on referrals dated on or after ``since``
+
+    Counts the same way as the all-time totals: earnings are paid commission
+    only and referrals include every status. Only the window's referrals are
+    read (range scan on the date index) and the database keeps the top rows,
+    so there is no resort of all affiliates.
+    """
+    paid = db.case((Referral.status == 'paid', Referral.commission_earned), else_=0.0)
+    earned = db.func.sum(paid).label('earned')
+    # Grouping on an expression stops SQLite from walking the whole
+    # affiliate_id index to avoid a sort; it range-scans the date index instead
+    affiliate_id = (Referral.affiliate_id + 0).label('affiliate_id')
+    window = (db.session.query(affiliate_id, earned,
+                               db.func.count(Referral.id).label('referrals'))
+              .filter(Referral.date >= since)
+              .group_by(affiliate_id)
+              .order_by(earned.desc())
+              .limit(LEADERBOARD_SIZE)
+              .subquery())
+    return (db.session.query(Affiliate.name, window.c.earned, window.c.referrals)
+            .join(window, Affiliate.id == window.c.affiliate_id)
+            .order_by(window.c.earned.desc())
+            .all())
+
 @affiliate_bp.route('/affiliate/all', methods=['GET'])
 def get_all_affiliates():
     """Get all affiliates (admin endpoint)"""
+    limit, after = page_args()
+    if limit is None:
+        if wants_ndjson():
+            return ndjson_response(stream_query(Affiliate.query.order_by(Affiliate.id)))
+        records = [affiliate.to_dict() for affiliate in Affiliate.query.order_by(Affiliate.id)]
+        return jsonify({
+            'success': True,
+            'affiliates': records
+        })
+
+    page, next_cursor = paginate_query(Affiliate.query, Affiliate.id, limit, after)
+    records = [affiliate.to_dict() for affiliate in page]
+    if wants_ndjson():
+        return ndjson_response(records)
     return jsonify({
         'success': True,
-        'affiliates': affiliates
+        'affiliates': records,
+        'next_cursor': next_cursor
     })
 
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
-import datetime
+from src.services.mailer import mailer
+from src.utils.ids import new_id
+from src.utils.pagination import NDJSON_MIMETYPE, iter_ndjson
+from src.services.matching import FreelancerIndex, assign_projects
 
 automation_bp = Blueprint('automation', __name__)
 
@@ -32,25 +35,35 @@ freelancers = [
     }
 ]
 
+# Skill/rate index over the freelancer pool; call freelancer_index.update()
+# after changing a freelancer's skills, rate or availability
+freelancer_index = FreelancerIndex(freelancers)
+
+# Candidates returned by /automation/assign-freelancer unless ?limit= is given
+DEFAULT_CANDIDATES = 5
+
+# Concurrent projects a freelancer takes in a batch unless the freelancer
+# record or the request says otherwise
+DEFAULT_FREELANCER_CAPACITY = 3
+MAX_BATCH_PROJECTS = 10000
+
+PROGRESS_SUBJECT = "Project #{project_id} Progress Update"
+PROGRESS_BODY = "Your project is {progress}% complete. We'll keep you updated on further progress."
+MAX_BULK_UPDATES = 100000
+
 def send_email_notification(to_email, subject, body):
-    """Send email notification (mock implementation)"""
-    # In a real implementation, you would configure SMTP settings
-    print(f"Email sent to {to_email}: {subject}")
-    return True
+    """Queue an email notification for background delivery"""
+    return mailer.send(to_email, subject, body)
+
+def match_freelancers(project_type, budget, limit=DEFAULT_CANDIDATES):
+    """Rank available freelancers whose skills cover the project type and whose
+    rate fits the budget (assuming 10 hours minimum)"""
+    return freelancer_index.match(project_type, budget, limit)
 
 def match_freelancer(project_type, budget):
     """Algorithm to match freelancer based on project requirements"""
-    available_freelancers = [f for f in freelancers if f['availability']]
-    
-    # Simple matching logic based on skills and budget
-    best_match = None
-    for freelancer in available_freelancers:
-        if project_type.lower() in ' '.join(freelancer['skills']).lower():
-            if budget >= freelancer['hourly_rate'] * 10:  # Assuming 10 hours minimum
-                if not best_match or freelancer['rating'] > best_match['rating']:
-                    best_match = freelancer
-    
-    return best_match
+    matches = match_freelancers(project_type, budget, limit=1)
+    return matches[0] if matches else None
 
 @automation_bp.route('/automation/assign-freelancer', methods=['POST'])
 def auto_assign_freelancer():
@@ -61,8 +74,11 @@ def auto_assign_freelancer():
     budget = data.get('budget', 0)
     client_email = data.get('client_email')
     
-    # Find best matching freelancer
-    matched_freelancer = match_freelancer(project_type, budget)
+    limit = request.args.get('limit', DEFAULT_CANDIDATES, type=int)
+    
+    # Find best matching freelancers
+    candidates = match_freelancers(project_type, budget, max(limit, 1))
+    matched_freelancer = candidates[0] if candidates else None
     
     if matched_freelancer:
         # Send notifications
@@ -75,7 +91,8 @@ def auto_assign_freelancer():
         return jsonify({
             'success': True,
             'message': 'Freelancer assigned successfully',
-            'freelancer': matched_freelancer
+            'freelancer': matched_freelancer,
+            'candidates': candidates
         })
     else:
         return jsonify({
@@ -83,6 +100,77 @@ def auto_assign_freelancer():
             'message': 'No suitable freelancer found'
         }), 404
 
+def _is_number(value):
+    # bool is an int subclass, but true/false is not a budget
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+@automation_bp.route('/automation/assign-freelancer/batch', methods=['POST'])
+def batch_assign_freelancers():
+    """Assign freelancers to many projects in one pass"""
+    data = request.get_json()
+    
+    projects = data.get('projects') or []
+    if (not isinstance(projects, list) or len(projects) > MAX_BATCH_PROJECTS
+            or not all(isinstance(p, dict) for p in projects)):
+        return jsonify({
+            'success': False,
+            'message': f'projects must be a list of at most {MAX_BATCH_PROJECTS} objects'
+        }), 400
+    
+    capacity = data.get('capacity')
+    if capacity is not None and (isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 0):
+        return jsonify({
+            'success': False,
+            'message': 'capacity must be a non-negative integer'
+        }), 400
+    for project in projects:
+        budget = project.get('budget')
+        if budget is not None and not _is_number(budget):
+            return jsonify({
+                'success': False,
+                'message': 'budget must be a number'
+            }), 400
+        if not isinstance(project.get('project_type') or '', str):
+            return jsonify({
+                'success': False,
+                'message': 'project_type must be a string'
+            }), 400
+    
+    def capacity_for(freelancer):
+        if capacity is not None:
+            return capacity
+        return freelancer.get('capacity', DEFAULT_FREELANCER_CAPACITY)
+    
+    matches = assign_projects(
+        freelancer_index,
+        [(p.get('project_type'), p.get('budget', 0)) for p in projects],
+        capacity_for
+    )
+    
+    assignments = []
+    unassigned = []
+    for project, freelancer in zip(projects, matches):
+        if freelancer is None:
+            unassigned.append(project.get('project_id'))
+            continue
+        send_email_notification(
+            project.get('client_email'),
+            "Project Assignment Confirmation",
+            f"Your project has been assigned to {freelancer['name']}"
+        )
+        assignments.append({
+            'project_id': project.get('project_id'),
+            'freelancer_id': freelancer['id'],
+            'freelancer_name': freelancer['name']
+        })
+    
+    return jsonify({
+        'success': True,
+        'assigned': len(assignments),
+        'assignments': assignments,
+        'unassigned': unassigned
+    })
+
 @automation_bp.route('/automation/send-progress-update', methods=['POST'])
 def send_progress_update():
     """Send automated progress update to client"""
@@ -92,8 +180,8 @@ def send_progress_update():
     project_id = data.get('project_id')
     progress = data.get('progress', 0)
     
-    subject = f"Project #{project_id} Progress Update"
-    body = f"Your project is {progress}% complete. We'll keep you updated on further progress."
+    subject = PROGRESS_SUBJECT.format(project_id=project_id)
+    body = PROGRESS_BODY.format(progress=progress)
     
     send_email_notification(client_email, subject, body)
     
@@ -102,6 +190,71 @@ def send_progress_update():
         'message': 'Progress update sent successfully'
     })
 
+def _valid_progress_update(update):
+    # Lists or objects here would be unhashable dedup keys or garbled emails
+    return (isinstance(update, dict)
+            and isinstance(update.get('client_email'), str) and update['client_email']
+            and isinstance(update.get('project_id'), (str, int, float, type(None)))
+            and isinstance(update.get('progress', 0), (str, int, float)))
+
+@automation_bp.route('/automation/send-progress-update/bulk', methods=['POST'])
+def send_bulk_progress_updates():
+    """Send many progress updates from a JSON array or an NDJSON stream"""
+    if request.mimetype == NDJSON_MIMETYPE:
+        updates = iter_ndjson(request.stream)
+    else:
+        data = request.get_json()
+        updates = data.get('updates') if isinstance(data, dict) else data
+        if not isinstance(updates, list):
+            return jsonify({
+                'success': False,
+                'message': 'Expected a JSON array of updates'
+            }), 400
+    
+    results = []
+    # Latest update per (client, project) wins; earlier ones are reported as duplicates
+    latest = {}
+    for index, update in enumerate(updates):
+        if index >= MAX_BULK_UPDATES:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_UPDATES} updates per request'
+            }), 413
+        if not _valid_progress_update(update):
+            results.append({'index': index, 'status': 'invalid'})
+            continue
+        key = (update['client_email'], update.get('project_id'))
+        if key in latest:
+            results[latest[key][0]]['status'] = 'duplicate'
+        latest[key] = (len(results), update)
+        results.append({'index': index, 'status': 'queued'})
+    
+    # Each distinct progress value is rendered once
+    bodies = {}
+    messages = []
+    positions = []
+    for position, update in latest.values():
+        progress = update.get('progress', 0)
+        if progress not in bodies:
+            bodies[progress] = PROGRESS_BODY.format(progress=progress)
+        subject = PROGRESS_SUBJECT.format(project_id=update.get('project_id'))
+        messages.append((update['client_email'], subject, bodies[progress]))
+        positions.append(position)
+    
+    queued = mailer.send_many(messages)
+    for position in positions[queued:]:
+        results[position]['status'] = 'dropped'
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    
+    return jsonify({
+        'success': queued == len(messages),
+        'summary': summary,
+        'results': results
+    })
+
 @automation_bp.route('/automation/quality-check', methods=['POST'])
 def automated_quality_check():
     """Perform automated quality checks on deliverables"""
@@ -145,7 +298,7 @@ def process_payment():
         'message': 'Payment processed successfully',
         'freelancer_payment': freelancer_payment,
         'platform_fee': platform_fee,
-        'transaction_id': f"TXN_{order_id}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
+        'transaction_id': f"TXN_{order_id}_{new_id()}"
     })
 
 @automation_bp.route('/automation/freelancers', methods=['GET'])
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-import uuid
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.consultation import Consultation, SlotReservation
+from src.services.mailer import mailer
+from src.services.slots import SlotCalendar
+from src.utils.ids import new_id
+from src.utils.pagination import ndjson_response, page_args, stream_query, wants_ndjson
 
 consultation_bp = Blueprint('consultation', __name__)
 
@@ -44,8 +50,20 @@ developers = [
     }
 ]
 
-# In-memory storage for consultations (use database in production)
-consultations = []
+developers_by_id = {d['id']: d for d in developers}
+slot_calendar = SlotCalendar(developers)
+
+DEFAULT_FREE_SLOTS = 5
+MAX_FREE_SLOTS = 100
+
+def reserved_slots(developer_id=None, start_date=None):
+    """Booked (developer_id, date, time) rows, through the reservation key"""
+    query = db.session.query(SlotReservation.developer_id, SlotReservation.date, SlotReservation.time)
+    if developer_id is not None:
+        query = query.filter(SlotReservation.developer_id == developer_id)
+    if start_date:
+        query = query.filter(SlotReservation.date >= start_date)
+    return query.all()
 
 @consultation_bp.route('/developers', methods=['GET'])
 def get_developers():
@@ -79,7 +97,7 @@ def book_consultation():
             }), 400
         
         # Find the developer
-        developer = next((d for d in developers if d['id'] == data['developer']), None)
+        developer = developers_by_id.get(data['developer'])
         if not developer:
             return jsonify({
                 "success": False,
@@ -87,44 +105,62 @@ def book_consultation():
             }), 404
         
         # Check availability
-        if data['date'] not in developer['availability']:
+        schedule = slot_calendar.get(developer['id'])
+        if not schedule.offers_date(data['date']):
             return jsonify({
                 "success": False,
                 "error": "Developer not available on selected date"
             }), 400
         
-        if data['time'] not in developer['time_slots']:
+        if not schedule.offers_time(data['time']):
             return jsonify({
                 "success": False,
                 "error": "Time slot not available"
             }), 400
         
         # Generate consultation ID
-        consultation_id = str(uuid.uuid4())
+        consultation_id = new_id("CONS")
         
         # Create consultation record
-        consultation = {
-            "id": consultation_id,
-            "package": data['package'],
-            "developer_id": data['developer'],
-            "developer_name": developer['name'],
-            "developer_email": developer['email'],
-            "date": data['date'],
-            "time": data['time'],
-            "client": client,
-            "status": "scheduled",
-            "created_at": datetime.now().isoformat(),
-            "zoom_link": developer['zoom_room'],
-            "calendly_link": developer['calendly_link']
-        }
+        consultation = Consultation(
+            id=consultation_id,
+            package=data['package'],
+            developer_id=data['developer'],
+            developer_name=developer['name'],
+            developer_email=developer['email'],
+            date=data['date'],
+            time=data['time'],
+            client=client,
+            client_email=client['email'],
+            status="scheduled",
+            created_at=datetime.now(),
+            zoom_link=developer['zoom_room'],
+            calendly_link=developer['calendly_link']
+        )
+        
+        db.session.add(consultation)
+        db.session.add(SlotReservation(
+            developer_id=developer['id'],
+            date=data['date'],
+            time=data['time'],
+            consultation_id=consultation_id
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another booking took the slot first
+            db.session.rollback()
+            return jsonify({
+                "success": False,
+                "error": "Time slot already booked"
+            }), 409
         
-        consultations.append(consultation)
+        # Confirmation emails to client and developer are queued, not sent inline
+        send_consultation_confirmation(consultation.to_dict())
         
-        # In production, you would:
-        # 1. Send confirmation email to client
-        # 2. Send notification to developer
-        # 3. Create calendar events
-        # 4. Set up automated reminders
+        # In production, you would also:
+        # 1. Create calendar events
+        # 2. Set up automated reminders
         
         return jsonify({
             "success": True,
@@ -139,6 +175,7 @@ def book_consultation():
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             "success": False,
             "error": str(e)
@@ -147,15 +184,45 @@ def book_consultation():
 @consultation_bp.route('/consultations', methods=['GET'])
 def get_consultations():
     """Get all consultations (admin endpoint)"""
+    # New ids are time-ordered, but rows from before that have random ids,
+    # so page in (created_at, id) order
+    ordered = Consultation.query.order_by(Consultation.created_at, Consultation.id)
+    limit, after = page_args(cursor_type=str)
+    if limit is None:
+        if wants_ndjson():
+            return ndjson_response(stream_query(ordered))
+        return jsonify({
+            "success": True,
+            "consultations": [c.to_dict() for c in ordered]
+        })
+
+    query = ordered
+    if after is not None:
+        cursor = db.session.get(Consultation, after)
+        if not cursor:
+            return jsonify({
+                "success": False,
+                "error": "Invalid cursor"
+            }), 400
+        query = query.filter(db.or_(
+            Consultation.created_at > cursor.created_at,
+            db.and_(Consultation.created_at == cursor.created_at, Consultation.id > cursor.id)
+        ))
+    rows = query.limit(limit + 1).all()
+    records = [c.to_dict() for c in rows[:limit]]
+    next_cursor = records[-1]["id"] if len(rows) > limit else None
+    if wants_ndjson():
+        return ndjson_response(records)
     return jsonify({
         "success": True,
-        "consultations": consultations
+        "consultations": records,
+        "next_cursor": next_cursor
     })
 
 @consultation_bp.route('/consultations/<consultation_id>', methods=['GET'])
 def get_consultation(consultation_id):
     """Get specific consultation details"""
-    consultation = next((c for c in consultations if c['id'] == consultation_id), None)
+    consultation = db.session.get(Consultation, consultation_id)
     
     if not consultation:
         return jsonify({
@@ -165,7 +232,7 @@ def get_consultation(consultation_id):
     
     return jsonify({
         "success": True,
-        "consultation": consultation
+        "consultation": consultation.to_dict()
     })
 
 @consultation_bp.route('/consultations/<consultation_id>/status', methods=['PUT'])
@@ -181,7 +248,7 @@ def update_consultation_status(consultation_id):
                 "error": "Invalid status"
             }), 400
         
-        consultation = next((c for c in consultations if c['id'] == consultation_id), None)
+        consultation = db.session.get(Consultation, consultation_id)
         
         if not consultation:
             return jsonify({
@@ -189,8 +256,27 @@ def update_consultation_status(consultation_id):
                 "error": "Consultation not found"
             }), 404
         
-        consultation['status'] = new_status
-        consultation['updated_at'] = datetime.now().isoformat()
+        if new_status == 'cancelled' and consultation.status != 'cancelled':
+            # Free the slot for other clients
+            SlotReservation.query.filter_by(consultation_id=consultation.id).delete()
+        elif new_status != 'cancelled' and consultation.status == 'cancelled':
+            db.session.add(SlotReservation(
+                developer_id=consultation.developer_id,
+                date=consultation.date,
+                time=consultation.time,
+                consultation_id=consultation.id
+            ))
+        
+        consultation.status = new_status
+        consultation.updated_at = datetime.now()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({
+                "success": False,
+                "error": "Time slot already booked"
+            }), 409
         
         return jsonify({
             "success": True,
@@ -198,6 +284,7 @@ def update_consultation_status(consultation_id):
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             "success": False,
             "error": str(e)
@@ -205,8 +292,8 @@ def update_consultation_status(consultation_id):
 
 @consultation_bp.route('/developers/<int:developer_id>/availability', methods=['GET'])
 def get_developer_availability(developer_id):
-    """Get specific developer's availability"""
-    developer = next((d for d in developers if d['id'] == developer_id), None)
+    """Get specific developer's free (unbooked) slots"""
+    developer = developers_by_id.get(developer_id)
     
     if not developer:
         return jsonify({
@@ -214,19 +301,40 @@ def get_developer_availability(developer_id):
             "error": "Developer not found"
         }), 404
     
+    free_slots = slot_calendar.free_slots(developer_id, reserved_slots(developer_id))
     return jsonify({
         "success": True,
         "availability": {
-            "dates": developer['availability'],
-            "time_slots": developer['time_slots']
+            "dates": list(free_slots),
+            "time_slots": developer['time_slots'],
+            "free_slots": free_slots
         }
     })
 
+@consultation_bp.route('/developers/free-slots', methods=['GET'])
+def get_next_free_slots():
+    """Get the next free slots across all developers"""
+    limit = request.args.get('limit', DEFAULT_FREE_SLOTS, type=int)
+    limit = min(max(limit, 1), MAX_FREE_SLOTS)
+    start_date = request.args.get('from')
+    
+    slots = slot_calendar.next_free(limit, reserved_slots(start_date=start_date), start_date)
+    return jsonify({
+        "success": True,
+        "slots": [
+            {
+                "developer_id": developer_id,
+                "developer_name": developers_by_id[developer_id]['name'],
+                "date": date,
+                "time": time
+            }
+            for date, time, developer_id in slots
+        ]
+    })
+
 # Email notification function (placeholder)
 def send_consultation_confirmation(consultation):
-    """Send confirmation email to client and developer"""
-    # In production, integrate with email service like SendGrid
-    print(f"Sending confirmation email for consultation {consultation['id']}")
+    """Queue confirmation emails to client and developer"""
     
     # Email to client
     client_email_content = f"""
@@ -266,5 +374,15 @@ def send_consultation_confirmation(consultation):
     HandleServ Team
     """
     
-    return True
+    client_queued = mailer.send(
+        consultation['client']['email'],
+        "Your video consultation is confirmed",
+        client_email_content
+    )
+    developer_queued = mailer.send(
+        consultation['developer_email'],
+        "New consultation scheduled",
+        developer_email_content
+    )
+    return client_queued and developer_queued
 
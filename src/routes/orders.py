@@ -1,55 +1,129 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
-import datetime
+from src.models.order import Order
+from src.utils.pagination import ndjson_response, page_args, paginate_query, stream_query, wants_ndjson
+from src.utils.response_cache import CachedJSON
 
 orders_bp = Blueprint('orders', __name__)
 
-# Mock data for demonstration
-orders_data = []
+PACKAGES = [
+    {
+        'name': 'Starter',
+        'price': 299,
+        'description': 'Perfect for small businesses and personal websites',
+        'features': [
+            'Up to 5 pages',
+            'Mobile responsive design',
+            'Basic SEO optimization',
+            'Contact form integration',
+            '7-day delivery',
+            '1 revision round'
+        ]
+    },
+    {
+        'name': 'Professional',
+        'price': 599,
+        'description': 'Ideal for growing businesses and e-commerce',
+        'features': [
+            'Up to 10 pages',
+            'Custom design & branding',
+            'Advanced SEO optimization',
+            'E-commerce integration',
+            'Social media integration',
+            '14-day delivery',
+            '3 revision rounds',
+            '30-day support'
+        ]
+    },
+    {
+        'name': 'Enterprise',
+        'price': 999,
+        'description': 'Complete solution for large businesses',
+        'features': [
+            'Unlimited pages',
+            'Premium custom design',
+            'Advanced functionality',
+            'Database integration',
+            'Third-party API integration',
+            '21-day delivery',
+            'Unlimited revisions',
+            '90-day support',
+            'Performance optimization'
+        ]
+    }
+]
+
+# The package catalog is static, so it is encoded once and served with an ETag
+packages_response = CachedJSON({
+    'success': True,
+    'packages': PACKAGES
+})
 
 @orders_bp.route('/orders', methods=['POST'])
 def create_order():
     """Create a new order"""
     data = request.get_json()
     
-    new_order = {
-        'id': len(orders_data) + 1,
-        'client_name': data.get('client_name'),
-        'client_email': data.get('client_email'),
-        'package': data.get('package'),
-        'project_type': data.get('project_type'),
-        'requirements': data.get('requirements'),
-        'deadline': data.get('deadline'),
-        'price': data.get('price'),
-        'status': 'Pending Payment',
-        'created_at': datetime.datetime.now().isoformat()
-    }
+    new_order = Order(
+        client_name=data.get('client_name'),
+        client_email=data.get('client_email'),
+        package=data.get('package'),
+        project_type=data.get('project_type'),
+        requirements=data.get('requirements'),
+        deadline=data.get('deadline'),
+        price=data.get('price'),
+        status='Pending Payment'
+    )
     
-    orders_data.append(new_order)
+    db.session.add(new_order)
+    db.session.commit()
     
     return jsonify({
         'success': True,
         'message': 'Order created successfully',
-        'order': new_order
+        'order': new_order.to_dict()
     }), 201
 
 @orders_bp.route('/orders', methods=['GET'])
 def get_orders():
-    """Get all orders"""
+    """Get all orders, optionally filtered by status and client email"""
+    query = Order.query
+    status = request.args.get('status')
+    if status is not None:
+        query = query.filter_by(status=status)
+    client_email = request.args.get('client_email')
+    if client_email is not None:
+        query = query.filter_by(client_email=client_email)
+
+    limit, after = page_args()
+    if limit is None:
+        if wants_ndjson():
+            return ndjson_response(stream_query(query.order_by(Order.id)))
+        orders = [order.to_dict() for order in query.order_by(Order.id)]
+        return jsonify({
+            'success': True,
+            'orders': orders
+        })
+
+    page, next_cursor = paginate_query(query, Order.id, limit, after)
+    orders = [order.to_dict() for order in page]
+    if wants_ndjson():
+        return ndjson_response(orders)
     return jsonify({
         'success': True,
-        'orders': orders_data
+        'orders': orders,
+        'next_cursor': next_cursor
     })
 
 @orders_bp.route('/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
     """Get specific order"""
-    for order in orders_data:
-        if order['id'] == order_id:
-            return jsonify({
-                'success': True,
-                'order': order
-            })
+    order = db.session.get(Order, order_id)
+    if order:
+        return jsonify({
+            'success': True,
+            'order': order.to_dict()
+        })
     
     return jsonify({
         'success': False,
@@ -61,14 +135,22 @@ def update_order_status(order_id):
     """Update order status"""
     data = request.get_json()
     
-    for order in orders_data:
-        if order['id'] == order_id:
-            order['status'] = data.get('status')
-            return jsonify({
-                'success': True,
-                'message': 'Order status updated successfully',
-                'order': order
-            })
+    status = data.get('status')
+    if not status:
+        return jsonify({
+            'success': False,
+            'message': 'Status is required'
+        }), 400
+    
+    order = db.session.get(Order, order_id)
+    if order:
+        order.status = status
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Order status updated successfully',
+            'order': order.to_dict()
+        })
     
     return jsonify({
         'success': False,
@@ -78,55 +160,4 @@ def update_order_status(order_id):
 @orders_bp.route('/packages', methods=['GET'])
 def get_packages():
     """Get available packages"""
-    packages = [
-        {
-            'name': 'Starter',
-            'price': 299,
-            'description': 'Perfect for small businesses and personal websites',
-            'features': [
-                'Up to 5 pages',
-                'Mobile responsive design',
-                'Basic SEO optimization',
-                'Contact form integration',
-                '7-day delivery',
-                '1 revision round'
-            ]
-        },
-        {
-            'name': 'Professional',
-            'price': 599,
-            'description': 'Ideal for growing businesses and e-commerce',
-            'features': [
-                'Up to 10 pages',
-                'Custom design & branding',
-                'Advanced SEO optimization',
-                'E-commerce integration',
-                'Social media integration',
-                '14-day delivery',
-                '3 revision rounds',
-                '30-day support'
-            ]
-        },
-        {
-            'name': 'Enterprise',
-            'price': 999,
-            'description': 'Complete solution for large businesses',
-            'features': [
-                'Unlimited pages',
-                'Premium custom design',
-                'Advanced functionality',
-                'Database integration',
-                'Third-party API integration',
-                '21-day delivery',
-                'Unlimited revisions',
-                '90-day support',
-                'Performance optimization'
-            ]
-        }
-    ]
-    
-    return jsonify({
-        'success': True,
-        'packages': packages
-    })
-
+    return packages_response.response()
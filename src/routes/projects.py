@@ -1,11 +1,13 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db
-import datetime
+from src.models.project import Project
+from src.utils.pagination import ndjson_response, page_args, paginate_query, stream_query, wants_ndjson
 
 projects_bp = Blueprint('projects', __name__)
 
-# Mock data for demonstration
-projects_data = [
+# Demo data loaded into an empty database
+DEMO_PROJECTS = [
     {
         'id': 1,
         'client_name': 'John Doe',
@@ -26,12 +28,40 @@ projects_data = [
     }
 ]
 
+# Columns a client may change through PUT /projects/<id>
+UPDATABLE_FIELDS = ('client_name', 'project_type', 'status', 'deadline', 'freelancer', 'price')
+
+def seed_demo_data():
+    """Insert the demo projects when the table is empty"""
+    if db.session.query(Project.id).first() is None:
+        db.session.add_all(Project(**project) for project in DEMO_PROJECTS)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker seeded the same ids first
+            db.session.rollback()
+
 @projects_bp.route('/projects', methods=['GET'])
 def get_projects():
     """Get all projects"""
+    limit, after = page_args()
+    if limit is None:
+        if wants_ndjson():
+            return ndjson_response(stream_query(Project.query.order_by(Project.id)))
+        projects = [project.to_dict() for project in Project.query.order_by(Project.id)]
+        return jsonify({
+            'success': True,
+            'projects': projects
+        })
+
+    page, next_cursor = paginate_query(Project.query, Project.id, limit, after)
+    projects = [project.to_dict() for project in page]
+    if wants_ndjson():
+        return ndjson_response(projects)
     return jsonify({
         'success': True,
-        'projects': projects_data
+        'projects': projects,
+        'next_cursor': next_cursor
     })
 
 @projects_bp.route('/projects', methods=['POST'])
@@ -39,22 +69,22 @@ def create_project():
     """Create a new project"""
     data = request.get_json()
     
-    new_project = {
-        'id': len(projects_data) + 1,
-        'client_name': data.get('client_name'),
-        'project_type': data.get('project_type'),
-        'status': 'Pending',
-        'deadline': data.get('deadline'),
-        'freelancer': None,
-        'price': data.get('price')
-    }
+    new_project = Project(
+        client_name=data.get('client_name'),
+        project_type=data.get('project_type'),
+        status='Pending',
+        deadline=data.get('deadline'),
+        freelancer=None,
+        price=data.get('price')
+    )
     
-    projects_data.append(new_project)
+    db.session.add(new_project)
+    db.session.commit()
     
     return jsonify({
         'success': True,
         'message': 'Project created successfully',
-        'project': new_project
+        'project': new_project.to_dict()
     }), 201
 
 @projects_bp.route('/projects/<int:project_id>', methods=['PUT'])
@@ -62,14 +92,17 @@ def update_project(project_id):
     """Update project status"""
     data = request.get_json()
     
-    for project in projects_data:
-        if project['id'] == project_id:
-            project.update(data)
-            return jsonify({
-                'success': True,
-                'message': 'Project updated successfully',
-                'project': project
-            })
+    project = db.session.get(Project, project_id)
+    if project:
+        for field in UPDATABLE_FIELDS:
+            if field in data:
+                setattr(project, field, data[field])
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Project updated successfully',
+            'project': project.to_dict()
+        })
     
     return jsonify({
         'success': False,
@@ -81,18 +114,18 @@ def assign_freelancer(project_id):
     """Assign freelancer to project"""
     data = request.get_json()
     
-    for project in projects_data:
-        if project['id'] == project_id:
-            project['freelancer'] = data.get('freelancer')
-            project['status'] = 'Assigned'
-            return jsonify({
-                'success': True,
-                'message': 'Freelancer assigned successfully',
-                'project': project
-            })
+    project = db.session.get(Project, project_id)
+    if project:
+        project.freelancer = data.get('freelancer')
+        project.status = 'Assigned'
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Freelancer assigned successfully',
+            'project': project.to_dict()
+        })
     
     return jsonify({
         'success': False,
         'message': 'Project not found'
     }), 404
-
@@ -0,0 +1,103 @@
+import os
+import time
+
+from flask import Blueprint, request, jsonify
+
+from src.models.user import db
+from src.models.order import Order
+from src.models.project import Project
+from src.models.consultation import Consultation
+from src.services.search import FTS5Index, InvertedIndex, SearchIndexer
+from src.utils.metrics import metrics
+
+search_bp = Blueprint('search', __name__)
+
+# Searchable record types and the columns that make up their text
+SEARCH_SOURCES = {
+    'order': (Order, ['client_name', 'client_email', 'package', 'project_type', 'requirements', 'status']),
+    'project': (Project, ['client_name', 'project_type', 'freelancer', 'status']),
+    'consultation': (Consultation, ['client', 'client_email', 'developer_name', 'package', 'status']),
+}
+SEARCH_TYPES = {'orders': 'order', 'projects': 'project', 'consultations': 'consultation'}
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# In-memory by default; configure_search() switches to FTS5 when asked and
+# builds the index
+search_indexer = SearchIndexer(InvertedIndex(), SEARCH_SOURCES)
+search_indexer.attach(db.session)
+metrics.register_stats('search', search_indexer.stats)
+
+
+def configure_search(engine):
+    """Pick the search backend and build its index before the first request
+
+    SEARCH_BACKEND=fts5 switches to the shared FTS5 index when the database
+    is SQLite. Call inside an app context once the tables exist. The
+    in-memory index is per worker and only sees that worker's writes after
+    it is built, so multi-worker deployments should use FTS5.
+    """
+    if os.environ.get('SEARCH_BACKEND', 'memory') == 'fts5' and engine.dialect.name == 'sqlite':
+        search_indexer.backend = FTS5Index()
+    # Built now rather than inside the first /search request, and so that
+    # writes are indexed from the start
+    search_indexer.ensure_ready(db.session)
+
+
+@search_bp.route('/search', methods=['GET'])
+def search():
+    """Ranked full-text search; the last word matches as a prefix"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'message': 'q is required'
+        }), 400
+
+    kinds = None
+    if request.args.get('type'):
+        names = [name.strip() for name in request.args['type'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SEARCH_TYPES]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'message': f"Unknown type: {', '.join(unknown)}"
+            }), 400
+        kinds = [SEARCH_TYPES[name] for name in names]
+
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'limit must be an integer'
+        }), 400
+
+    start = time.perf_counter()
+    hits = search_indexer.search(db.session, query, kinds=kinds, limit=limit)
+    took_ms = (time.perf_counter() - start) * 1000
+
+    # One IN query per record type for the hits that are shown
+    refs = {}
+    for kind, ref, _ in hits:
+        refs.setdefault(kind, []).append(ref)
+    records = {}
+    for kind, ids in refs.items():
+        model = SEARCH_SOURCES[kind][0]
+        if model.id.type.python_type is int:
+            ids = [int(ref) for ref in ids]
+        for record in model.query.filter(model.id.in_(ids)):
+            records[(kind, str(record.id))] = record
+
+    results = []
+    for kind, ref, score in hits:
+        record = records.get((kind, str(ref)))
+        if record is not None:  # deleted by another worker since it was indexed
+            results.append({'type': kind, 'id': record.id, 'score': score, 'record': record.to_dict()})
+
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': results,
+        'took_ms': round(took_ms, 2)
+    })
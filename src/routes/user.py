@@ -1,12 +1,118 @@
-from flask import Blueprint, jsonify, request
+import csv
+import io
+import os
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
 from src.models.user import User, db
+from src.utils.cache import ReadThroughCache, TTLCache, shared_cache_from_env
+from src.utils.metrics import metrics
+from src.utils.pagination import NDJSON_MIMETYPE, iter_ndjson
 
 user_bp = Blueprint('user', __name__)
 
+# Rows per multi-row INSERT (and per commit) in /users/bulk
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_USERS = 1_000_000
+
+# Rows fetched per round trip by /users/export
+EXPORT_BATCH_SIZE = 1000
+
+# Columns clients can ask for with ?fields= (and the ones export writes)
+USER_FIELDS = ('id', 'username', 'email')
+
+# Ids per IN (...) query for ?ids= and /users/lookup, kept well under
+# SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+MAX_LOOKUP_IDS = 10000
+
+# Serialized /users/<id> bodies. Writes invalidate both tiers, but only this
+# process's local tier, so other workers may serve an old profile for up to
+# USER_CACHE_TTL seconds; the shared tier (CACHE_URL) is invalidated for all.
+user_cache = ReadThroughCache(
+    'user',
+    TTLCache(maxsize=10000, ttl=float(os.environ.get('USER_CACHE_TTL', 5))),
+    shared=shared_cache_from_env(),
+)
+metrics.register_stats('cache', user_cache.stats, cache='user')
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """List users, or only ``?ids=1,2,3``, with only ``?fields=id,username``"""
+    try:
+        fields = _parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    ids = request.args.get('ids')
+    if ids is not None:
+        try:
+            ids = [int(user_id) for user_id in ids.split(',') if user_id.strip()]
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'ids must be comma-separated integers'
+            }), 400
+
+    if ids is None:
+        columns = [getattr(User, field) for field in fields]
+        rows = db.session.execute(select(*columns).order_by(User.id))
+        return jsonify([dict(zip(fields, row)) for row in rows])
+    return _lookup_response(ids, fields)
+
+@user_bp.route('/users/lookup', methods=['POST'])
+def lookup_users():
+    """Same as GET /users?ids=&fields= for id sets too long for a URL"""
+    data = request.get_json(silent=True)
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(user_id, int) and not isinstance(user_id, bool)
+                                            for user_id in ids):
+        return jsonify({
+            'success': False,
+            'message': 'Expected {"ids": [integers], "fields": [...]}'
+        }), 400
+    fields = data.get('fields')
+    if isinstance(fields, list):
+        fields = ','.join(str(field) for field in fields)
+    try:
+        fields = _parse_fields(fields)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    return _lookup_response(ids, fields)
+
+def _parse_fields(fields):
+    if not fields:
+        return USER_FIELDS
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in requested if field not in USER_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(unknown)}; choose from {', '.join(USER_FIELDS)}")
+    return requested or USER_FIELDS
+
+def _lookup_response(ids, fields):
+    """Users for ``ids`` in request order, selecting only ``fields``; unknown ids are left out"""
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_LOOKUP_IDS:
+        return jsonify({
+            'success': False,
+            'message': f'At most {MAX_LOOKUP_IDS} ids per request'
+        }), 413
+
+    columns = [getattr(User, field) for field in fields]
+    found = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+        # id is selected first to put rows back in request order
+        for row in db.session.execute(select(User.id, *columns).where(User.id.in_(chunk))):
+            found[row[0]] = dict(zip(fields, row[1:]))
+    return jsonify([found[user_id] for user_id in ids if user_id in found])
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -15,12 +121,164 @@ def create_user():
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
     db.session.commit()
+    # SQLite can hand out the id of a deleted row again
+    user_cache.invalidate(user.id)
     return jsonify(user.to_dict()), 201
 
+@user_bp.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Create users from a JSON array or an NDJSON stream in chunked inserts"""
+    if request.mimetype == NDJSON_MIMETYPE:
+        records = iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        records = data.get('users') if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({
+                'success': False,
+                'message': 'Expected a JSON array of users'
+            }), 400
+        if len(records) > MAX_BULK_USERS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_USERS} users per request'
+            }), 413
+
+    created = 0
+    errors = []
+    chunk = []
+    for index, record in enumerate(records):
+        if index >= MAX_BULK_USERS:
+            # Earlier chunks of the stream are already committed
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_USERS} users per request; the rest were not read',
+                'created': created + _import_chunk(chunk, errors),
+                'errors': errors
+            }), 413
+        if not isinstance(record, dict) or not isinstance(record.get('username'), str) \
+                or not isinstance(record.get('email'), str) \
+                or not record['username'] or not record['email']:
+            errors.append({'index': index, 'error': 'username and email are required'})
+            continue
+        chunk.append((index, record['username'], record['email']))
+        if len(chunk) == BULK_CHUNK_SIZE:
+            created += _import_chunk(chunk, errors)
+            chunk = []
+    created += _import_chunk(chunk, errors)
+    errors.sort(key=lambda error: error['index'])
+
+    return jsonify({
+        'success': not errors,
+        'created': created,
+        'failed': len(errors),
+        'errors': errors
+    }), 201 if created else 200
+
+def _import_chunk(chunk, errors):
+    """Insert ``(index, username, email)`` rows; rejected rows go to ``errors``"""
+    if not chunk:
+        return 0
+    usernames = {username for _, username, _ in chunk}
+    emails = {email for _, _, email in chunk}
+    taken_usernames = set(db.session.scalars(select(User.username).where(User.username.in_(usernames))))
+    taken_emails = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+
+    rows = []
+    for index, username, email in chunk:
+        if username in taken_usernames:
+            errors.append({'index': index, 'error': f'username {username!r} is already taken'})
+        elif email in taken_emails:
+            errors.append({'index': index, 'error': f'email {email!r} is already taken'})
+        else:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+            rows.append((index, {'username': username, 'email': email}))
+    if not rows:
+        return 0
+
+    try:
+        ids = db.session.scalars(insert(User).returning(User.id), [row for _, row in rows]).all()
+        db.session.commit()
+        _invalidate_users(ids)
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+
+    # A concurrent request took one of these names after the check above;
+    # retry row by row to find out which
+    created = 0
+    for index, row in rows:
+        try:
+            user_id = db.session.scalar(insert(User).returning(User.id), row)
+            db.session.commit()
+            _invalidate_users([user_id])
+            created += 1
+        except IntegrityError:
+            db.session.rollback()
+            errors.append({'index': index, 'error': 'username or email is already taken'})
+    return created
+
+def _invalidate_users(ids):
+    # As in create_user: a reused id may still have a deleted user's cached body
+    for user_id in ids:
+        user_cache.invalidate(user_id)
+
+@user_bp.route('/users/export', methods=['GET'])
+def export_users():
+    """Stream every user as NDJSON (default) or CSV without loading ORM objects"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({
+            'success': False,
+            'message': 'format must be ndjson or csv'
+        }), 400
+
+    def batches():
+        # yield_per streams from a server-side cursor where the driver has one
+        result = db.session.execute(
+            select(*[getattr(User, field) for field in USER_FIELDS])
+            .order_by(User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        yield from result.partitions()
+
+    if export_format == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(USER_FIELDS)
+            for rows in batches():
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        response = Response(stream_with_context(generate()), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename=users.csv'
+        return response
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        for rows in batches():
+            yield ''.join(dumps(dict(zip(USER_FIELDS, row))) + '\n' for row in rows)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    def load():
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        return (current_app.json.dumps(user.to_dict()) + '\n').encode()
+
+    body = user_cache.get(user_id, load)
+    if body is None:
+        abort(404)
+    return current_app.response_class(body, mimetype='application/json')
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
@@ -29,6 +287,7 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    user_cache.invalidate(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -36,4 +295,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(user_id)
     return '', 204
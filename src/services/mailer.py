@@ -0,0 +1,276 @@
+"""Background email delivery.
+
+Request handlers call ``mailer.send(...)`` or ``mailer.send_many(...)``,
+which only put messages on a queue bounded by message count. Worker threads
+drain the queue in batches, deliver each batch over a single transport
+connection and retry failures with exponential backoff. A message that
+keeps failing on its own is dropped without holding up the rest of its
+batch.
+
+The transport is picked from the environment: ``SMTP_HOST`` (plus
+``SMTP_PORT``, ``SMTP_USER``, ``SMTP_PASSWORD``, ``SMTP_STARTTLS``) selects
+SMTP, otherwise messages are printed to stdout. ``MemoryTransport`` is a
+local stand-in that keeps delivered messages in a list.
+"""
+from collections import deque
+from contextlib import contextmanager
+from email.message import EmailMessage
+import atexit
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(to_email, subject, body, sender=None):
+    message = EmailMessage()
+    message['From'] = sender or os.environ.get('MAIL_FROM', 'no-reply@handleserv.com')
+    message['To'] = to_email
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+
+class ConsoleTransport:
+    """Print a line per message instead of delivering it"""
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def send(self, message):
+        print(f"Email sent to {message['To']}: {message['Subject']}")
+
+
+class MemoryTransport:
+    """Collect delivered messages in memory (local SMTP stand-in)"""
+
+    def __init__(self):
+        self.sent = []
+        self.connections = 0
+
+    @contextmanager
+    def connect(self):
+        self.connections += 1
+        yield self
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class SMTPTransport:
+    """Deliver over SMTP, one connection per batch"""
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    @contextmanager
+    def connect(self):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            yield _SMTPSession(smtp)
+
+
+class _SMTPSession:
+    def __init__(self, smtp):
+        self.smtp = smtp
+
+    def send(self, message):
+        self.smtp.send_message(message)
+
+
+def transport_from_env():
+    host = os.environ.get('SMTP_HOST')
+    if not host:
+        return ConsoleTransport()
+    return SMTPTransport(
+        host,
+        port=int(os.environ.get('SMTP_PORT', 587)),
+        username=os.environ.get('SMTP_USER'),
+        password=os.environ.get('SMTP_PASSWORD'),
+        starttls=os.environ.get('SMTP_STARTTLS', '1') != '0'
+    )
+
+
+class NotificationDispatcher:
+    """Queue of outbound message batches drained by worker threads
+
+    At most ``maxsize`` messages wait at once, however they are batched.
+    """
+
+    def __init__(self, transport, maxsize=10000, workers=2, batch_size=50,
+                 max_retries=3, backoff=0.5):
+        self.transport = transport
+        self.maxsize = maxsize
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._pending = 0   # messages queued or being delivered
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def send(self, to_email, subject, body):
+        """Queue an email; returns False when the queue is full"""
+        return self._put([(to_email, subject, body)])
+
+    def send_many(self, messages):
+        """Queue ``(to_email, subject, body)`` tuples as whole batches
+
+        Returns how many were queued.
+
+        Messages are queued in order, so when the queue fills up the ones
+        after the returned count are the ones that were dropped.
+        """
+        queued = 0
+        for start in range(0, len(messages), self.batch_size):
+            # A rejected chunk drops everything after it too, not just itself
+            if not self._put(messages[start:start + self.batch_size], len(messages) - start):
+                break
+            queued = min(len(messages), start + self.batch_size)
+        return queued
+
+    def _put(self, batch, dropping=None):
+        # ``dropping`` is how many messages a rejection loses (the batch by default)
+        if dropping is None:
+            dropping = len(batch)
+        self._ensure_started()
+        with self._lock:
+            full = self._pending + len(batch) > self.maxsize
+            if full:
+                self.dropped += dropping
+            else:
+                self._pending += len(batch)
+        if full:
+            logger.warning("Mail queue full, dropping %d message(s)", dropping)
+            return False
+        self._queue.put(batch)
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every queued message has been handled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self):
+        return {
+            'queued_batches': self._queue.qsize(),
+            'queued_messages': self._pending,
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so start them in each worker process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._run, name=f'mailer-{i}', daemon=True).start()
+            if self._pid is None:
+                atexit.register(self.flush, 10)
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            # Queue items are lists of messages; merge small ones up to batch_size
+            items = 1
+            batch = list(self._queue.get())
+            while len(batch) < self.batch_size:
+                try:
+                    batch.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                items += 1
+            try:
+                self._deliver(batch)
+            except Exception:
+                # Never let the loop end: a dead worker strands everything queued after it
+                logger.exception("Mail worker failed on a batch of %d message(s)", len(batch))
+            finally:
+                with self._lock:
+                    self._pending -= len(batch)
+                for _ in range(items):
+                    self._queue.task_done()
+
+    def _deliver(self, batch):
+        # MIME messages are built here, off the request thread
+        pending = deque()
+        for fields in batch:
+            try:
+                pending.append(build_message(*fields))
+            except Exception:
+                # e.g. a newline in an address or subject; nothing to retry
+                logger.error("Cannot build message to %r", fields[0], exc_info=True)
+                with self._lock:
+                    self.failed += 1
+        # Consecutive failures without progress; reset whenever a message is handled
+        failures = 0
+        while pending:
+            sending = False
+            try:
+                with self.transport.connect() as connection:
+                    while pending:
+                        sending = True
+                        try:
+                            connection.send(pending[0])
+                        except smtplib.SMTPRecipientsRefused:
+                            # Retrying will not help a rejected address
+                            logger.error("Recipient refused: %s", pending[0]['To'])
+                            pending.popleft()
+                            with self._lock:
+                                self.failed += 1
+                            continue
+                        pending.popleft()
+                        failures = 0
+                        with self._lock:
+                            self.sent += 1
+                return
+            except Exception:
+                failures += 1
+                if failures > self.max_retries:
+                    if not sending:
+                        break
+                    # The same message failed every attempt; drop it, keep the rest
+                    logger.error("Giving up on message to %s after %d attempts",
+                                 pending[0]['To'], failures, exc_info=True)
+                    pending.popleft()
+                    failures = 0
+                    with self._lock:
+                        self.failed += 1
+                    continue
+                logger.warning("Mail delivery failed, retrying %d message(s)", len(pending), exc_info=True)
+                time.sleep(self.backoff * 2 ** (failures - 1))
+
+        if pending:
+            with self._lock:
+                self.failed += len(pending)
+            logger.error("Giving up on %d message(s) after %d attempts", len(pending), self.max_retries + 1)
+
+
+mailer = NotificationDispatcher(transport_from_env())
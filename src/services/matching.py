@@ -0,0 +1,185 @@
+"""Skill and budget index used to match freelancers to projects."""
+from bisect import bisect_right, insort
+from collections import deque
+import heapq
+import re
+import threading
+
+# A project must cover at least this many hours at the freelancer's rate
+MIN_BILLABLE_HOURS = 10
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.+#-]*")
+
+
+def normalize(text):
+    """Split a skill or project type into lowercase match tokens"""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def _rank_key(freelancer):
+    # Highest rating first, lowest id breaks ties
+    return freelancer['rating'], -freelancer['id']
+
+
+class FreelancerIndex:
+    """Inverted skill index plus an hourly-rate ordering of available freelancers
+
+    A match is the intersection of the posting sets for every token in the
+    project type, narrowed by a range query on hourly rate, so the cost
+    depends on how many freelancers share the skill rather than on the size
+    of the whole pool.
+    """
+
+    def __init__(self, freelancers=()):
+        self._freelancers = {}
+        # What each freelancer was indexed under, so an in-place edit of the
+        # record can still be unindexed correctly
+        self._entries = {}
+        self._postings = {}
+        self._rates = []
+        self._lock = threading.RLock()
+        for freelancer in freelancers:
+            self.add(freelancer)
+
+    def __len__(self):
+        return len(self._freelancers)
+
+    def get(self, freelancer_id):
+        return self._freelancers.get(freelancer_id)
+
+    def add(self, freelancer):
+        with self._lock:
+            if freelancer['id'] in self._freelancers:
+                self._remove(freelancer['id'])
+            tokens = {token for skill in freelancer['skills'] for token in normalize(skill)}
+            rate_entry = None
+            if freelancer['availability']:
+                rate_entry = (freelancer['hourly_rate'], freelancer['id'])
+                insort(self._rates, rate_entry)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(freelancer['id'])
+            self._freelancers[freelancer['id']] = freelancer
+            self._entries[freelancer['id']] = (tokens, rate_entry)
+
+    def update(self, freelancer):
+        """Re-index a freelancer after its skills, rate or availability change"""
+        self.add(freelancer)
+
+    def remove(self, freelancer_id):
+        with self._lock:
+            if freelancer_id in self._freelancers:
+                self._remove(freelancer_id)
+
+    def match(self, project_type, budget, limit=5):
+        """Return up to ``limit`` available freelancers ranked by rating"""
+        tokens = normalize(project_type)
+        if not tokens or limit <= 0:
+            return []
+        max_rate = (budget or 0) / MIN_BILLABLE_HOURS
+
+        with self._lock:
+            postings = [self._postings.get(token) for token in tokens]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            skilled = postings[0].intersection(*postings[1:])
+
+            # Rate range query: available freelancers with rate <= max_rate
+            affordable_end = bisect_right(self._rates, (max_rate, float('inf')))
+            if affordable_end < len(skilled):
+                ids = [fid for _, fid in self._rates[:affordable_end] if fid in skilled]
+            else:
+                ids = [fid for fid in skilled
+                       if self._entries[fid][1] is not None and self._entries[fid][1][0] <= max_rate]
+            candidates = [self._freelancers[fid] for fid in ids]
+
+        return heapq.nlargest(limit, candidates, key=_rank_key)
+
+    def _remove(self, freelancer_id):
+        tokens, rate_entry = self._entries.pop(freelancer_id)
+        for token in tokens:
+            bucket = self._postings.get(token)
+            if bucket is not None:
+                bucket.discard(freelancer_id)
+                if not bucket:
+                    del self._postings[token]
+        if rate_entry is not None:
+            position = bisect_right(self._rates, rate_entry) - 1
+            if position >= 0 and self._rates[position] == rate_entry:
+                del self._rates[position]
+        del self._freelancers[freelancer_id]
+
+
+def assign_projects(index, projects, capacity_for, candidates_per_project=None):
+    """Assign many projects at once without overloading any freelancer
+
+    ``projects`` is a list of ``(project_type, budget)`` pairs and
+    ``capacity_for(freelancer)`` gives how many projects a freelancer may
+    take. Each project is placed with its best-rated candidate that has room;
+    when all of its candidates are full, earlier assignments are shifted
+    along an augmenting path to make room, so the number of assigned
+    projects is maximal for the candidate lists considered (every match
+    unless ``candidates_per_project`` caps them).
+
+    Returns a list holding the assigned freelancer (or None) per project.
+    """
+    limit = candidates_per_project or len(index)
+    # Backlogs repeat the same project type and budget a lot; rank each once
+    ranked = {}
+    candidates = []
+    for project_type, budget in projects:
+        key = (tuple(normalize(project_type)), budget)
+        if key not in ranked:
+            ranked[key] = [f['id'] for f in index.match(project_type, budget, limit)]
+        candidates.append(ranked[key])
+    capacity = {}
+    load = {}
+    owner = [None] * len(projects)
+    # Freelancers seen by a failed search can never reach spare capacity
+    # again (assignments only ever fill slots), so later searches skip them
+    exhausted = set()
+
+    def has_room(freelancer_id):
+        if freelancer_id not in capacity:
+            capacity[freelancer_id] = capacity_for(index.get(freelancer_id))
+        return len(load.get(freelancer_id, ())) < capacity[freelancer_id]
+
+    # Most constrained projects first keeps the augmenting searches short
+    for project in sorted(range(len(projects)), key=lambda i: len(candidates[i])):
+        # Breadth-first search for a freelancer with room; parent[f] records
+        # which project moves into f and the freelancer it moves out of
+        parent = {}
+        queue = deque()
+        for freelancer_id in candidates[project]:
+            if freelancer_id not in parent and freelancer_id not in exhausted:
+                parent[freelancer_id] = (project, None)
+                queue.append(freelancer_id)
+        free = None
+        while queue:
+            freelancer_id = queue.popleft()
+            if has_room(freelancer_id):
+                free = freelancer_id
+                break
+            for moved in load.get(freelancer_id, ()):
+                for alternative in candidates[moved]:
+                    if alternative not in parent and alternative not in exhausted:
+                        parent[alternative] = (moved, freelancer_id)
+                        queue.append(alternative)
+        if free is None:
+            exhausted.update(parent)
+            continue
+
+        # Shift each project on the path into the freelancer that was found
+        target = free
+        while True:
+            moved, source = parent[target]
+            if source is not None:
+                load[source].remove(moved)
+            load.setdefault(target, []).append(moved)
+            owner[moved] = target
+            if source is None:
+                break
+            target = source
+
+    return [index.get(freelancer_id) if freelancer_id is not None else None
+            for freelancer_id in owner]
@@ -0,0 +1,407 @@
+"""Full-text search over database records.
+
+Two interchangeable backends index one text document per record, keyed by
+``(kind, ref)``:
+
+``InvertedIndex`` keeps postings in memory and ranks with BM25. Query
+terms must all match (the last one as a prefix, for search-as-you-type).
+It is built from the database by ``SearchIndexer.ensure_ready`` (at startup,
+or else on the first search) and then kept current from committed sessions,
+so each worker process has its own copy and sees only its own writes until
+it restarts. Writes before the build are not tracked; the build reads them.
+
+``FTS5Index`` stores the documents in an SQLite FTS5 table inside the
+application database and updates it in the same transaction as the record,
+so every worker sees the same index.
+
+``SearchIndexer`` hooks a session so that inserts, updates and deletes of
+the registered models reach the backend without the routes doing anything.
+"""
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import math
+import re
+import threading
+
+from sqlalchemy import event, select
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# A prefix query looks at no more than MAX_PREFIX_SCAN vocabulary matches
+# (alphabetically first) and keeps the MAX_PREFIX_TERMS most common of them
+MAX_PREFIX_TERMS = 50
+MAX_PREFIX_SCAN = 5000
+# Shorter final terms match exactly; a one-letter prefix matches half the index
+MIN_PREFIX_LENGTH = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# New terms go into a small sorted list first (cheap to insert into) that is
+# merged into the main vocabulary once it reaches 1/16th of its size
+_VOCAB_MERGE_MIN = 4096
+_VOCAB_MERGE_RATIO = 16
+
+
+def tokenize(text):
+    """Lowercase word tokens; emails and URLs split on punctuation"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def document_text(values):
+    """Join column values (including JSON dicts and lists) into one document"""
+    parts = []
+    for value in values:
+        if isinstance(value, dict):
+            parts.append(document_text(value.values()))
+        elif isinstance(value, (list, tuple)):
+            parts.append(document_text(value))
+        elif value is not None:
+            parts.append(str(value))
+    return ' '.join(parts)
+
+
+class InvertedIndex:
+    """In-memory BM25 index with prefix matching on the last query term"""
+
+    transactional = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docnos = {}       # (kind, ref) -> docno
+        self._keys = []         # docno -> (kind, ref), None once removed
+        self._lengths = []      # docno -> token count
+        self._terms = []        # docno -> distinct terms, for removal
+        self._free = []         # docnos of removed documents, reused first
+        self._postings = {}     # term -> {docno: term frequency}
+        self._vocab = []        # sorted terms; may hold removed ones until the next merge
+        self._recent = []       # sorted terms added since the last merge
+        self._total_length = 0
+        self.ready = False
+
+    def __len__(self):
+        return len(self._docnos)
+
+    def add(self, kind, ref, text):
+        counts = Counter(tokenize(text))
+        with self._lock:
+            docno = self._docnos.get((kind, ref))
+            if docno is not None:
+                self._unlink(docno)
+            elif self._free:
+                docno = self._free.pop()
+            else:
+                docno = len(self._keys)
+                self._keys.append(None)
+                self._lengths.append(0)
+                self._terms.append(())
+            self._docnos[(kind, ref)] = docno
+            self._keys[docno] = (kind, ref)
+            length = sum(counts.values())
+            self._lengths[docno] = length
+            self._terms[docno] = tuple(counts)
+            self._total_length += length
+            for term, frequency in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = {}
+                    insort(self._recent, term)
+                posting[docno] = frequency
+            if len(self._recent) >= max(_VOCAB_MERGE_MIN, len(self._vocab) // _VOCAB_MERGE_RATIO):
+                self._merge_vocab()
+
+    def remove(self, kind, ref):
+        with self._lock:
+            docno = self._docnos.pop((kind, ref), None)
+            if docno is None:
+                return
+            self._unlink(docno)
+            self._keys[docno] = None
+            self._free.append(docno)
+
+    def _unlink(self, docno):
+        for term in self._terms[docno]:
+            posting = self._postings[term]
+            del posting[docno]
+            if not posting:
+                del self._postings[term]  # left in the vocabulary until the next merge
+        self._total_length -= self._lengths[docno]
+        self._terms[docno] = ()
+
+    def _merge_vocab(self):
+        # Two sorted runs, which sorted() merges in linear time
+        merged = sorted(self._vocab + self._recent)
+        self._vocab = [term for i, term in enumerate(merged)
+                       if term in self._postings and (i == 0 or merged[i - 1] != term)]
+        self._recent = []
+
+    def _expand(self, prefix):
+        """Indexed terms starting with ``prefix``, capped at the most frequent"""
+        matches = set()
+        for vocab in (self._vocab, self._recent):
+            end = min(len(vocab), bisect_left(vocab, prefix) + MAX_PREFIX_SCAN)
+            for i in range(bisect_left(vocab, prefix), end):
+                term = vocab[i]
+                if not term.startswith(prefix):
+                    break
+                if term in self._postings:
+                    matches.add(term)
+        if len(matches) > MAX_PREFIX_TERMS:
+            return heapq.nlargest(MAX_PREFIX_TERMS, matches, key=lambda term: len(self._postings[term]))
+        return list(matches)
+
+    def search(self, query, kinds=None, limit=20):
+        """``[(kind, ref, score)]`` best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            documents = len(self._docnos)
+            if not documents:
+                return []
+            groups = []
+            for position, term in enumerate(terms):
+                if position == len(terms) - 1 and len(term) >= MIN_PREFIX_LENGTH:
+                    group = self._expand(term)
+                else:
+                    group = [term] if term in self._postings else []
+                if not group:
+                    return []
+                groups.append(group)
+
+            # Intersect starting from the rarest group so the candidate set stays small
+            groups.sort(key=lambda group: sum(len(self._postings[term]) for term in group))
+            candidates = set()
+            for term in groups[0]:
+                candidates.update(self._postings[term])
+            for group in groups[1:]:
+                postings = [self._postings[term] for term in group]
+                candidates = {docno for docno in candidates if any(docno in posting for posting in postings)}
+                if not candidates:
+                    return []
+
+            if kinds:
+                candidates = {docno for docno in candidates if self._keys[docno][0] in kinds}
+            weights = []
+            for group in groups:
+                for term in group:
+                    posting = self._postings[term]
+                    idf = math.log(1 + (documents - len(posting) + 0.5) / (len(posting) + 0.5))
+                    weights.append((posting, idf * (BM25_K1 + 1)))
+
+            lengths = self._lengths
+            base = BM25_K1 * (1 - BM25_B)
+            per_token = BM25_K1 * BM25_B * documents / (self._total_length or 1)
+            scores = []
+            for docno in candidates:
+                norm = base + per_token * lengths[docno]
+                total = 0.0
+                for posting, weight in weights:
+                    frequency = posting.get(docno)
+                    if frequency:
+                        total += weight * frequency / (frequency + norm)
+                scores.append((total, docno))
+            best = heapq.nlargest(limit, scores)
+            return [self._keys[docno] + (round(value, 4),) for value, docno in best]
+
+    def stats(self):
+        return {
+            'documents': len(self._docnos),
+            'terms': len(self._postings)
+        }
+
+
+class FTS5Index:
+    """Documents in an SQLite FTS5 table, ranked by SQLite's bm25()"""
+
+    transactional = True
+
+    def __init__(self, table='search'):
+        self.docs_table = f'{table}_docs'
+        self.fts_table = f'{table}_fts'
+        self.ready = False
+        self.updates = 0
+
+    def create(self, connection):
+        """Create the tables if needed; returns True when the index is empty"""
+        # search_docs gives each (kind, ref) a stable rowid shared with its FTS row
+        connection.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS {self.docs_table} (kind TEXT NOT NULL, ref TEXT NOT NULL, '
+            f'PRIMARY KEY (kind, ref))'
+        )
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} "
+            f"USING fts5(body, tokenize='unicode61', prefix='2 3')"
+        )
+        return connection.exec_driver_sql(f'SELECT 1 FROM {self.docs_table} LIMIT 1').first() is None
+
+    def add(self, kind, ref, text, connection):
+        connection.exec_driver_sql(
+            f'INSERT INTO {self.docs_table} (kind, ref) VALUES (?, ?) ON CONFLICT DO NOTHING', (kind, str(ref))
+        )
+        rowid = connection.exec_driver_sql(
+            f'SELECT rowid FROM {self.docs_table} WHERE kind = ? AND ref = ?', (kind, str(ref))
+        ).scalar()
+        connection.exec_driver_sql(f'DELETE FROM {self.fts_table} WHERE rowid = ?', (rowid,))
+        connection.exec_driver_sql(f'INSERT INTO {self.fts_table} (rowid, body) VALUES (?, ?)', (rowid, text))
+        self.updates += 1
+
+    def remove(self, kind, ref, connection):
+        rowid = connection.exec_driver_sql(
+            f'SELECT rowid FROM {self.docs_table} WHERE kind = ? AND ref = ?', (kind, str(ref))
+        ).scalar()
+        if rowid is not None:
+            connection.exec_driver_sql(f'DELETE FROM {self.fts_table} WHERE rowid = ?', (rowid,))
+            connection.exec_driver_sql(f'DELETE FROM {self.docs_table} WHERE rowid = ?', (rowid,))
+            self.updates += 1
+
+    def search(self, query, connection, kinds=None, limit=20):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        # Quoted so FTS5 operators in user input are matched as text
+        match = ' '.join(f'"{term}"' for term in terms)
+        if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+            match += '*'
+        sql = (f'SELECT d.kind, d.ref, bm25({self.fts_table}) AS rank FROM {self.fts_table} '
+               f'JOIN {self.docs_table} d ON d.rowid = {self.fts_table}.rowid '
+               f'WHERE {self.fts_table} MATCH ?')
+        params = [match]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += ' ORDER BY rank LIMIT ?'
+        params.append(limit)
+        rows = connection.exec_driver_sql(sql, tuple(params))
+        return [(kind, ref, round(-rank, 4)) for kind, ref, rank in rows]
+
+    def stats(self):
+        # Document totals live in the shared table; this process only knows its own writes
+        return {'updates': self.updates}
+
+
+class SearchIndexer:
+    """Feeds inserts, updates and deletes of registered models to a backend
+
+    ``sources`` maps a kind name to ``(model, [text columns])``.
+    """
+
+    def __init__(self, backend, sources):
+        self.backend = backend
+        self.sources = sources
+        self._kinds = {model: kind for kind, (model, _) in sources.items()}
+        self._lock = threading.Lock()
+        # Commits made while the in-memory index is being built, replayed after it
+        self._backlog = None
+        self._backlog_lock = threading.Lock()
+
+    def attach(self, session):
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_soft_rollback', self._after_rollback)
+
+    def document(self, kind, record):
+        _, columns = self.sources[kind]
+        return document_text(getattr(record, column) for column in columns)
+
+    def rebuild(self, session, batch_size=2000):
+        """Index every registered record, reading columns rather than ORM objects"""
+        connection = session.connection() if self.backend.transactional else None
+        for kind, (model, columns) in self.sources.items():
+            rows = session.execute(
+                select(model.id, *[getattr(model, column) for column in columns])
+                .execution_options(yield_per=batch_size)
+            )
+            for row in rows:
+                self._apply(('add', kind, row[0], document_text(row[1:])), connection)
+
+    def ensure_ready(self, session):
+        """Build the index the first time it is needed in this process"""
+        if self.backend.ready:
+            return
+        with self._lock:
+            if self.backend.ready:
+                return
+            if self.backend.transactional:
+                connection = session.connection()
+                # Rebuilding is idempotent, so workers racing on an empty table is harmless
+                if self.backend.create(connection):
+                    self.rebuild(session)
+                session.commit()
+                self.backend.ready = True
+                return
+            # The build reads a snapshot; commits from other requests after it
+            # starts are queued and replayed (add and remove are idempotent)
+            with self._backlog_lock:
+                self._backlog = []
+            try:
+                self.rebuild(session)
+            except Exception:
+                # The next search rebuilds, which reads these commits from the tables
+                with self._backlog_lock:
+                    self._backlog = None
+                raise
+            with self._backlog_lock:
+                for operation in self._backlog:
+                    self._apply(operation)
+                self._backlog = None
+                self.backend.ready = True
+
+    def search(self, session, query, kinds=None, limit=20):
+        self.ensure_ready(session)
+        if self.backend.transactional:
+            return self.backend.search(query, session.connection(), kinds=kinds, limit=limit)
+        return self.backend.search(query, kinds=kinds, limit=limit)
+
+    def stats(self):
+        return self.backend.stats()
+
+    def _apply(self, operation, connection=None):
+        action, kind, ref = operation[:3]
+        args = (connection,) if connection is not None else ()
+        if action == 'add':
+            self.backend.add(kind, ref, operation[3], *args)
+        else:
+            self.backend.remove(kind, ref, *args)
+
+    def _after_flush(self, session, flush_context):
+        if not self.backend.ready and (self.backend.transactional or self._backlog is None):
+            # No index to keep up to date yet (and for FTS5 the tables may not
+            # exist); building reads everything anyway. Only an in-memory build
+            # in progress needs these, through the backlog
+            return
+        operations = []
+        for record in session.new | session.dirty:
+            kind = self._kinds.get(type(record))
+            if kind is not None:
+                operations.append(('add', kind, record.id, self.document(kind, record)))
+        for record in session.deleted:
+            kind = self._kinds.get(type(record))
+            if kind is not None:
+                operations.append(('remove', kind, record.id))
+        if not operations:
+            return
+        if self.backend.transactional:
+            connection = session.connection()
+            for operation in operations:
+                self._apply(operation, connection)
+        else:
+            # Applied once the transaction commits, so rolled-back rows never show up
+            session.info.setdefault('search_operations', []).extend(operations)
+
+    def _after_commit(self, session):
+        operations = session.info.pop('search_operations', None)
+        if not operations:
+            return
+        with self._backlog_lock:
+            if self._backlog is not None:
+                self._backlog.extend(operations)
+                return
+            if not self.backend.ready:
+                return  # committed before any build started, so the build reads it
+        for operation in operations:
+            self._apply(operation)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('search_operations', None)
@@ -0,0 +1,92 @@
+"""Slot calendar for developer consultations.
+
+Each developer offers a fixed set of dates and time slots. A day's bookings
+are a bitmask over the developer's time slots, so testing a slot, listing
+a day's free slots and walking forward to the next free slot are all bit
+operations. The masks are built from the reservation rows passed in; the
+database's unique key on reservations is what makes booking atomic.
+"""
+import heapq
+
+
+class DeveloperSchedule:
+    """Offered dates and time slots of one developer"""
+
+    def __init__(self, developer):
+        self.developer_id = developer['id']
+        self.dates = sorted(developer['availability'])
+        self.times = sorted(developer['time_slots'])
+        self._date_set = set(self.dates)
+        self._bit = {time: 1 << i for i, time in enumerate(self.times)}
+        self.full_mask = (1 << len(self.times)) - 1
+
+    def offers_date(self, date):
+        return date in self._date_set
+
+    def offers_time(self, time):
+        return time in self._bit
+
+    def mask(self, times):
+        """Bitmask for a collection of booked times"""
+        bits = 0
+        for time in times:
+            bits |= self._bit.get(time, 0)
+        return bits
+
+    def free_times(self, taken_mask):
+        free = ~taken_mask & self.full_mask
+        return [time for i, time in enumerate(self.times) if free >> i & 1]
+
+    def iter_free(self, taken, start_date=None):
+        """Yield free ``(date, time)`` pairs in order; ``taken`` maps date -> mask"""
+        for date in self.dates:
+            if start_date and date < start_date:
+                continue
+            free = ~taken.get(date, 0) & self.full_mask
+            while free:
+                low = free & -free
+                yield date, self.times[low.bit_length() - 1], self.developer_id
+                free ^= low
+
+
+class SlotCalendar:
+    """Schedules for every developer, keyed by id"""
+
+    def __init__(self, developers):
+        self._schedules = {d['id']: DeveloperSchedule(d) for d in developers}
+
+    def get(self, developer_id):
+        return self._schedules.get(developer_id)
+
+    def taken_masks(self, reservations):
+        """Group ``(developer_id, date, time)`` rows into per-day bitmasks"""
+        masks = {}
+        for developer_id, date, time in reservations:
+            schedule = self._schedules.get(developer_id)
+            if schedule:
+                day = masks.setdefault(developer_id, {})
+                day[date] = day.get(date, 0) | schedule.mask((time,))
+        return masks
+
+    def free_slots(self, developer_id, reservations):
+        """Free times per offered date for one developer"""
+        schedule = self._schedules[developer_id]
+        taken = self.taken_masks(reservations).get(developer_id, {})
+        slots = {}
+        for date in schedule.dates:
+            times = schedule.free_times(taken.get(date, 0))
+            if times:
+                slots[date] = times
+        return slots
+
+    def next_free(self, count, reservations, start_date=None):
+        """The earliest ``count`` free slots across all developers"""
+        masks = self.taken_masks(reservations)
+        streams = [schedule.iter_free(masks.get(developer_id, {}), start_date)
+                   for developer_id, schedule in self._schedules.items()]
+        slots = []
+        for date, time, developer_id in heapq.merge(*streams):
+            slots.append((date, time, developer_id))
+            if len(slots) >= count:
+                break
+        return slots
@@ -0,0 +1,175 @@
+"""Small in-process caches shared by the blueprints."""
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class LocalSharedCache:
+    """Stand-in for a shared cache server with the subset of the Redis API we use
+
+    It lives in this process, so it is only shared between threads; point
+    CACHE_URL at Redis to share entries between workers.
+    """
+
+    def __init__(self, maxsize=100000):
+        self._cache = TTLCache(maxsize=maxsize, ttl=float('inf'))
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ex=None):
+        self._cache.set(key, value, ttl=ex)
+
+    def delete(self, key):
+        self._cache.invalidate(key)
+
+
+def shared_cache_from_env():
+    """Shared tier named by CACHE_URL (``redis://...`` or ``memory://``), else None"""
+    url = os.environ.get('CACHE_URL')
+    if not url:
+        return None
+    if url == 'memory://':
+        return LocalSharedCache()
+    try:
+        import redis
+    except ImportError:
+        logger.warning('CACHE_URL is set but the redis package is not installed; using no shared cache')
+        return None
+    return redis.Redis.from_url(url)
+
+
+class ReadThroughCache:
+    """Per-process TTLCache in front of an optional shared cache
+
+    ``get(key, load)`` returns the cached value or calls ``load()`` and
+    caches its result unless it is None. ``invalidate(key)`` drops the key
+    from both tiers; a load of that key that started before the invalidation
+    does not put its now stale result back. Loads of other keys are not
+    affected.
+    """
+
+    # Invalidation stamps kept per key; older ones collapse into _floor
+    MAX_TRACKED_INVALIDATIONS = 10000
+
+    def __init__(self, name, local, shared=None, shared_ttl=300):
+        self.name = name
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._clock = 0
+        self._invalidated = OrderedDict()  # key -> clock at its last invalidation
+        self._floor = 0  # latest stamp dropped from _invalidated
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key):
+        return f'{self.name}:{key}'
+
+    def get(self, key, load):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if self.shared is not None:
+            value = self.shared.get(self._shared_key(key))
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value
+            self.shared_misses += 1
+
+        started = self._clock
+        value = load()
+        if value is not None:
+            with self._lock:
+                if started >= max(self._invalidated.get(key, 0), self._floor):
+                    self.local.set(key, value)
+                    if self.shared is not None:
+                        self.shared.set(self._shared_key(key), value, ex=self.shared_ttl)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._clock += 1
+            self._invalidated[key] = self._clock
+            self._invalidated.move_to_end(key)
+            if len(self._invalidated) > self.MAX_TRACKED_INVALIDATIONS:
+                # Conservative: loads older than the dropped stamp are not stored
+                self._floor = self._invalidated.popitem(last=False)[1]
+            self.local.invalidate(key)
+            if self.shared is not None:
+                self.shared.delete(self._shared_key(key))
+
+    def stats(self):
+        stats = self.local.stats()
+        lookups = stats['hits'] + stats['misses']
+        hits = stats['hits'] + self.shared_hits
+        stats.update({
+            'shared_hits': self.shared_hits,
+            'shared_misses': self.shared_misses,
+            # Served without touching the database, across both tiers
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        })
+        return stats
@@ -0,0 +1,94 @@
+"""Database URL and engine configuration from the environment.
+
+``DATABASE_URL`` selects the database. The default is the SQLite file
+under ``database/``; a server URL such as ``postgresql://...`` switches
+every worker to that server. Pool sizing comes from ``DB_POOL_SIZE``,
+``DB_MAX_OVERFLOW``, ``DB_POOL_TIMEOUT`` and ``DB_POOL_RECYCLE``.
+
+File-backed SQLite runs in WAL mode with the pragmas from
+``src.utils.sqlite`` unless ``SQLITE_WAL=0``, which also switches an
+existing WAL database file back to a rollback journal.
+"""
+import os
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from src.utils.sqlite import (DEFAULT_CHECKPOINT_INTERVAL, disable_wal, enable_wal, is_file_database, set_pragmas,
+                              sqlite_pragmas)
+
+# Server databases only; SQLite keeps SQLAlchemy's defaults unless overridden
+SERVER_POOL_DEFAULTS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,   # below common server/proxy idle timeouts
+}
+
+POOL_ENV = {
+    'pool_size': 'DB_POOL_SIZE',
+    'max_overflow': 'DB_MAX_OVERFLOW',
+    'pool_timeout': 'DB_POOL_TIMEOUT',
+    'pool_recycle': 'DB_POOL_RECYCLE',
+}
+
+
+def database_url(default):
+    url = os.environ.get('DATABASE_URL', default)
+    # Heroku/Render still hand out postgres://, which SQLAlchemy 1.4+ rejects
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``url``"""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return {}  # single shared connection; pool options do not apply
+        options = {}
+    else:
+        options = dict(SERVER_POOL_DEFAULTS, pool_pre_ping=True)
+    for option, env in POOL_ENV.items():
+        if os.environ.get(env):
+            options[option] = int(os.environ[env])
+    return options
+
+
+def configure_engine(engine):
+    """Apply the SQLite settings to a new engine; returns the WAL checkpointer, if any"""
+    if not is_file_database(engine):
+        return None
+    checkpointer = None
+    if os.environ.get('SQLITE_WAL', '1') != '0':
+        checkpointer = enable_wal(
+            engine,
+            checkpoint_interval=float(os.environ.get('SQLITE_CHECKPOINT_INTERVAL', DEFAULT_CHECKPOINT_INTERVAL)),
+        )
+    set_pragmas(engine, sqlite_pragmas())
+    if checkpointer is None:
+        # After set_pragmas, so the switch waits out busy_timeout for other writers
+        disable_wal(engine)
+    return checkpointer
+
+
+def create_schema(db, attempts=10):
+    """``db.create_all()`` that tolerates other workers booting at the same time
+
+    create_all checks for each table before creating it, so a worker that
+    loses the race gets "table ... already exists". Running it again on
+    fresh connections (pooled SQLite ones can hold a stale schema) skips
+    the tables created so far; with several workers racing that can take a
+    few rounds.
+    """
+    for attempt in range(attempts):
+        try:
+            db.create_all()
+            return
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            db.engine.dispose()
+            time.sleep(0.05 * (attempt + 1))
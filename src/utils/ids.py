@@ -0,0 +1,84 @@
+"""Time-ordered unique ids (Snowflake layout).
+
+An id is a 64-bit integer made of a millisecond timestamp (41 bits), a
+worker id (10 bits) and a per-millisecond sequence (12 bits). Ids from one
+process are strictly increasing, ids from different workers never collide
+as long as each worker has its own ``WORKER_ID`` (0-1023), and the fixed-
+width hex form sorts the same way as the integer, so ids double as cursor
+keys. Without ``WORKER_ID`` the worker id is the pid modulo 1024, which is
+distinct for the workers of one host but not across hosts or containers
+(they all tend to run as pid 1), so multi-host deployments must set a
+distinct ``WORKER_ID`` on each.
+"""
+import os
+import threading
+import time
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+_TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+
+def default_worker_id():
+    """``WORKER_ID`` from the environment, else this process's pid modulo 1024"""
+    worker_id = os.environ.get('WORKER_ID')
+    if worker_id is None:
+        return os.getpid() & MAX_WORKER_ID
+    worker_id = int(worker_id)
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise ValueError(f'WORKER_ID must be between 0 and {MAX_WORKER_ID}, got {worker_id}')
+    return worker_id
+
+
+class IdGenerator:
+    """Monotonic Snowflake-style id source; safe to share between threads"""
+
+    def __init__(self, worker_id=None):
+        self.worker_id = default_worker_id() if worker_id is None else worker_id
+        if not 0 <= self.worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'worker_id must be between 0 and {MAX_WORKER_ID}')
+        self._worker_bits = self.worker_id << SEQUENCE_BITS
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_int(self):
+        with self._lock:
+            now = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting
+                # from the last timestamp so ids never repeat or go backwards
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << _TIMESTAMP_SHIFT) | self._worker_bits | self._sequence
+
+    def next_id(self, prefix=None):
+        """Fixed-width hex id, optionally as ``PREFIX_<hex>``"""
+        value = f'{self.next_int():016x}'
+        return f'{prefix}_{value}' if prefix else value
+
+
+_generator = IdGenerator()
+
+
+def _reset_after_fork():
+    # A forked Gunicorn worker must not continue the parent's sequence
+    global _generator
+    _generator = IdGenerator()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def new_id(prefix=None):
+    return _generator.next_id(prefix)
@@ -0,0 +1,71 @@
+"""JSON provider backed by orjson when it is installed.
+
+Output follows Flask's default provider (sorted keys, HTTP dates, compact
+unless debugging), except that non-ASCII text is written as UTF-8 rather
+than ``\\u`` escapes.
+
+Model instances with a ``to_dict()`` method are serialized through the
+encoder's ``default`` hook. Routes still pass ``to_dict()`` results, so their
+responses do not depend on this provider being installed.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(o):
+    to_dict = getattr(o, 'to_dict', None)
+    if callable(to_dict):
+        return to_dict()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Drop-in replacement for ``DefaultJSONProvider``"""
+
+    default = staticmethod(_default)
+    # Also applies to the stdlib fallback, so both paths write UTF-8
+    ensure_ascii = False
+
+    def _options(self, indent=False):
+        # Datetimes go through ``default`` so they are HTTP dates, as with stdlib
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, indent=False):
+        """Encode ``obj`` straight to UTF-8 bytes"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options(indent))
+            except TypeError:
+                pass  # e.g. integers over 64 bits; stdlib reports anything truly unserializable
+        if indent:
+            return super().dumps(obj, indent=2).encode()
+        return super().dumps(obj, separators=(',', ':')).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return super().loads(s)  # stdlib accepts NaN/Infinity, orjson does not
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
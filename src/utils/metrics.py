@@ -0,0 +1,196 @@
+"""Per-route request metrics exposed in the Prometheus text format.
+
+Every thread records into its own shard, so the request path never takes a
+lock; shards are only summed when ``/api/metrics`` is scraped. Shards of
+threads that have exited are folded into a retired total, which keeps the
+list bounded on servers that start a thread per request.
+
+Each worker process keeps its own numbers, so behind a multi-worker server
+a scrape reports the worker that answered it.
+"""
+from bisect import bisect_left
+import threading
+import time
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Requests that match no route share one label instead of one per probed URL
+UNMATCHED = '<unmatched>'
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+
+
+class _Shard:
+    """Counters written by exactly one thread"""
+
+    def __init__(self, thread=None):
+        self.thread = thread
+        self.in_flight = 0
+        self.requests = {}        # (method, endpoint, status) -> count
+        self.latency = {}         # (method, endpoint) -> _Histogram
+        self.request_size = {}
+        self.response_size = {}
+
+    def observe(self, table, key, buckets, value):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = _Histogram(buckets)
+        histogram.observe(value)
+
+    def merge(self, other):
+        self.in_flight += other.in_flight
+        for key, count in other.requests.copy().items():
+            self.requests[key] = self.requests.get(key, 0) + count
+        for name in ('latency', 'request_size', 'response_size'):
+            table = getattr(self, name)
+            for key, histogram in getattr(other, name).copy().items():
+                if key not in table:
+                    table[key] = _Histogram(histogram.buckets)
+                table[key].merge(histogram)
+
+
+class RequestMetrics:
+    def __init__(self, app=None):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+        self._stats = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def register_stats(self, prefix, stats, **labels):
+        """Export the numbers returned by ``stats()`` as ``<prefix>_<key>`` gauges"""
+        self._stats.append((prefix, stats, labels))
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                live = []
+                for other in self._shards:
+                    if other.thread.is_alive():
+                        live.append(other)
+                    else:
+                        self._retired.merge(other)
+                live.append(shard)
+                self._shards = live
+        return shard
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        self._shard().in_flight += 1
+
+    def _after_request(self, response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        shard = self._shard()
+        method = request.method
+        endpoint = request.url_rule.rule if request.url_rule else UNMATCHED
+        key = (method, endpoint, str(response.status_code))
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        route = (method, endpoint)
+        shard.observe(shard.latency, route, LATENCY_BUCKETS, time.perf_counter() - start)
+        shard.observe(shard.request_size, route, SIZE_BUCKETS, request.content_length or 0)
+        if response.content_length is not None:  # unknown for streamed bodies
+            shard.observe(shard.response_size, route, SIZE_BUCKETS, response.content_length)
+        return response
+
+    def _teardown_request(self, exc=None):
+        # Runs after a streamed body is finished, so the request stays in flight until then
+        if g.pop('metrics_start', None) is not None:
+            self._shard().in_flight -= 1
+
+    def snapshot(self):
+        """Sum of all shards; safe to call while requests are being recorded"""
+        total = _Shard()
+        with self._lock:
+            total.merge(self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            total.merge(shard)
+        return total
+
+    def render(self):
+        total = self.snapshot()
+        lines = []
+
+        lines.append('# HELP http_requests_total Requests handled, by route and status code.')
+        lines.append('# TYPE http_requests_total counter')
+        for (method, endpoint, status), count in sorted(total.requests.items()):
+            labels = _labels(method=method, endpoint=endpoint, status=status)
+            lines.append(f'http_requests_total{labels} {count}')
+
+        lines.append('# HELP http_requests_in_flight Requests currently being handled.')
+        lines.append('# TYPE http_requests_in_flight gauge')
+        lines.append(f'http_requests_in_flight {total.in_flight}')
+
+        for name, help_text, table in (
+            ('http_request_duration_seconds', 'Time spent handling the request.', total.latency),
+            ('http_request_size_bytes', 'Request body size.', total.request_size),
+            ('http_response_size_bytes', 'Response body size, when known up front.', total.response_size),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (method, endpoint), histogram in sorted(table.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    labels = _labels(method=method, endpoint=endpoint, le=str(bound))
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                labels = _labels(method=method, endpoint=endpoint)
+                lines.append(f'{name}_sum{labels} {histogram.total}')
+                lines.append(f'{name}_count{labels} {cumulative}')
+
+        gauges = {}
+        for prefix, stats, labels in self._stats:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    gauges.setdefault(f'{prefix}_{key}', []).append((labels, value))
+        for name, samples in sorted(gauges.items()):
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(**labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = RequestMetrics()
@@ -0,0 +1,68 @@
+"""Keyset pagination and NDJSON streaming for list endpoints."""
+import json
+
+from flask import Response, current_app, request, stream_with_context
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def page_args(cursor_type=int):
+    """Read ``?limit=&after=`` from the query string.
+
+    Returns ``(None, None)`` when the client did not ask for a page, so
+    list endpoints keep returning the full collection by default.
+    """
+    limit = request.args.get('limit', type=int)
+    after = request.args.get('after', type=cursor_type)
+    if limit is None and after is None:
+        return None, None
+    if limit is None or limit <= 0:
+        limit = DEFAULT_LIMIT
+    return min(limit, MAX_LIMIT), after
+
+
+def paginate_query(query, column, limit, after):
+    """Keyset-paginate a SQLAlchemy query on an indexed, unique ``column``"""
+    if after is not None:
+        query = query.filter(column > after)
+    rows = query.order_by(column).limit(limit + 1).all()
+    page, extra = rows[:limit], rows[limit:]
+    next_cursor = getattr(page[-1], column.key) if extra else None
+    return page, next_cursor
+
+
+def stream_query(query, batch_size=500):
+    """Yield serialized rows from a query without loading it all at once"""
+    for row in query.yield_per(batch_size):
+        yield row.to_dict()
+
+
+def wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(records):
+    """Stream records one JSON document per line without building the body"""
+    dumps = current_app.json.dumps
+
+    def generate():
+        for record in records:
+            yield dumps(record) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def iter_ndjson(stream):
+    """Lazily parse one JSON document per line; bad lines yield None"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
@@ -0,0 +1,65 @@
+"""Pre-encoded JSON responses for catalog endpoints that rarely change."""
+import gzip
+import hashlib
+import threading
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+class CachedJSON:
+    """JSON body serialized and compressed once, served with strong ETags
+
+    The payload is encoded on the first request (so the app's JSON provider
+    is used) and again only after ``update()``. Clients sending a matching
+    ``If-None-Match`` get an empty 304.
+    """
+
+    def __init__(self, payload, max_age=300):
+        self.max_age = max_age
+        self._payload = payload
+        self._variants = None
+        self._lock = threading.Lock()
+
+    def update(self, payload):
+        with self._lock:
+            self._payload = payload
+            self._variants = None
+
+    def response(self):
+        variants = self._variants or self._encode()
+        encodings = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in variants and encodings[encoding]:
+                break
+        else:
+            encoding = 'identity'
+        body, etag = variants[encoding]
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _encode(self):
+        with self._lock:
+            if self._variants is None:
+                body = (current_app.json.dumps(self._payload) + '\n').encode()
+                etag = hashlib.sha256(body).hexdigest()[:32]
+                # A strong ETag must differ per content encoding
+                variants = {'identity': (body, etag),
+                            'gzip': (gzip.compress(body, 9, mtime=0), f'{etag}-gzip')}
+                if brotli is not None:
+                    variants['br'] = (brotli.compress(body), f'{etag}-br')
+                self._variants = variants
+            return self._variants
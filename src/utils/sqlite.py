@@ -0,0 +1,172 @@
+"""Write-ahead-log mode and connection pragmas for the SQLite database.
+
+In WAL mode a commit appends its pages to ``<db>-wal`` instead of rewriting
+the database file. With ``synchronous=NORMAL`` the log is not fsynced on
+each commit. Commits are grouped and synced when the log is checkpointed
+back into the database file. A crash can lose the last few commits but
+never corrupts the database. Readers keep reading the database file while
+a writer appends, so GETs no longer wait for POSTs.
+
+Checkpoints run on a background thread rather than inside whichever
+request happens to cross SQLite's auto-checkpoint threshold. At exit the
+log is folded into the database file and truncated, so the next start has
+nothing to recover.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+# Applied to every new connection; see sqlite_pragmas() for the env overrides
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,        # ms to wait on a locked database instead of failing
+    'cache_size': -64000,        # negative means KiB: 64MB page cache per connection
+    'mmap_size': 268435456,      # read up to 256MB of the file through mmap
+    'temp_store': 'MEMORY',
+}
+
+# Safety net if the checkpoint thread falls behind: SQLite checkpoints on
+# commit once the log holds this many pages (about 40MB at 4KB pages)
+AUTOCHECKPOINT_PAGES = 10000
+
+
+class WALCheckpointer:
+    """Periodically copies the write-ahead log back into the database file"""
+
+    def __init__(self, engine, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.engine = engine
+        self.interval = interval
+        self.checkpoints = 0
+        self.busy = 0
+        self.wal_frames = 0
+        self.last_checkpoint_ms = 0.0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def checkpoint(self, mode='PASSIVE'):
+        """Run ``PRAGMA wal_checkpoint(mode)``; returns (busy, log frames, checkpointed frames)"""
+        start = time.perf_counter()
+        with self.engine.connect() as connection:
+            busy, log_frames, checkpointed = connection.exec_driver_sql(
+                f'PRAGMA wal_checkpoint({mode})'
+            ).one()
+        self.checkpoints += 1
+        self.busy += busy
+        self.wal_frames = log_frames
+        self.last_checkpoint_ms = (time.perf_counter() - start) * 1000
+        return busy, log_frames, checkpointed
+
+    def stats(self):
+        return {
+            'checkpoints': self.checkpoints,
+            'busy': self.busy,
+            'wal_frames': self.wal_frames,
+            'last_checkpoint_ms': self.last_checkpoint_ms
+        }
+
+    def ensure_started(self):
+        # Threads do not survive a fork, so start one in each worker process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name='sqlite-checkpoint', daemon=True).start()
+            if self._pid is None:
+                atexit.register(self._close)
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception('WAL checkpoint failed')
+
+    def _close(self):
+        try:
+            self.checkpoint('TRUNCATE')
+        except Exception:
+            logger.exception('Final WAL checkpoint failed')
+
+
+def is_file_database(engine):
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def sqlite_pragmas():
+    """DEFAULT_PRAGMAS with SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE and SQLITE_SYNCHRONOUS overrides from the environment"""
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if os.environ.get('SQLITE_BUSY_TIMEOUT_MS'):
+        pragmas['busy_timeout'] = int(os.environ['SQLITE_BUSY_TIMEOUT_MS'])
+    if os.environ.get('SQLITE_CACHE_SIZE_KB'):
+        pragmas['cache_size'] = -int(os.environ['SQLITE_CACHE_SIZE_KB'])
+    if os.environ.get('SQLITE_MMAP_SIZE'):
+        pragmas['mmap_size'] = int(os.environ['SQLITE_MMAP_SIZE'])
+    if os.environ.get('SQLITE_SYNCHRONOUS'):
+        pragmas['synchronous'] = os.environ['SQLITE_SYNCHRONOUS'].upper()
+    return pragmas
+
+
+def set_pragmas(engine, pragmas):
+    """Run ``PRAGMA key=value`` for each item on every new connection"""
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f'PRAGMA {key}={value}')
+        cursor.close()
+
+
+def enable_wal(engine, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """Put a file-backed SQLite ``engine`` in WAL mode; returns its checkpointer
+
+    Returns None for other databases and in-memory SQLite, which have no log.
+    Call before set_pragmas() so an explicit ``synchronous`` there wins.
+    """
+    if not is_file_database(engine):
+        return None
+    checkpointer = WALCheckpointer(engine, checkpoint_interval)
+
+    @event.listens_for(engine, 'connect')
+    def set_wal_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA wal_autocheckpoint={AUTOCHECKPOINT_PAGES}')
+        cursor.close()
+        checkpointer.ensure_started()
+
+    return checkpointer
+
+
+def disable_wal(engine):
+    """Switch a database file left in WAL mode back to a rollback journal
+
+    The journal mode is stored in the file, so not calling enable_wal() is
+    not enough to leave WAL. Leaving it needs the only open connection to the
+    file; if another process holds one, the file stays in WAL mode and a
+    warning is logged. Returns True when the file is no longer in WAL mode.
+    """
+    if not is_file_database(engine):
+        return True
+    try:
+        with engine.connect() as connection:
+            mode = connection.exec_driver_sql('PRAGMA journal_mode=DELETE').scalar()
+    except OperationalError:
+        mode = None
+    if mode != 'delete':
+        logger.warning('SQLITE_WAL=0 but %s is still in WAL mode; '
+                       'it switches once no other process has it open', engine.url.database)
+        return False
+    return True
@@ -0,0 +1,165 @@
+"""In-memory static file serving for the front-end build.
+
+The static folder is scanned once: every file gets a content-hash ETag and
+a mimetype, small files (and always index.html) are kept in memory, and any
+``.br``/``.gz`` siblings are registered as precompressed variants. Requests
+are answered from that index without touching the filesystem, except for
+large files, which are streamed from disk. Call ``rescan()`` after a deploy,
+or pass ``watch_interval`` to poll the folder for changes.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import Response, request, send_file
+
+# Files at most this size are held in memory
+MAX_CACHED_SIZE = 256 * 1024
+
+# Build tools put a content hash in asset names; those can be cached by
+# browsers forever. Only the shapes bundlers emit count: lowercase hex of
+# 8/16/20/32 digits (webpack, Vite 4: app.3f9a2c1b.js, main.3f9a2c1b.chunk.js)
+# or 8 base32 characters (esbuild: main-5KJ2QF7A.css), each mixing letters
+# and digits so dated names like report-20240101.pdf are not taken for hashes
+HASHED_NAME_RE = re.compile(
+    r'[.-](?:'
+    r'(?=[0-9a-f]*[a-f])(?=[0-9a-f]*[0-9])(?:[0-9a-f]{32}|[0-9a-f]{20}|[0-9a-f]{16}|[0-9a-f]{8})'
+    r'|(?=[A-Z2-7]*[A-Z])(?=[A-Z2-7]*[2-7])[A-Z2-7]{8}'
+    r')(?:\.[0-9a-z]+){1,2}$'
+)
+HASHED_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'no-cache'
+
+COMPRESSED_SUFFIXES = {'.br': 'br', '.gz': 'gzip'}
+
+
+class StaticFile:
+    def __init__(self, path, data=None):
+        self.path = path
+        self.data = data
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = None
+        self.variants = {}
+
+
+class StaticFiles:
+    """Snapshot of a static folder served from memory"""
+
+    def __init__(self, root, watch_interval=None):
+        self.root = root
+        self._files = {}
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self.watch_interval = watch_interval
+        self._watch_pid = None
+        self.rescan()
+
+    def rescan(self):
+        fingerprint = self._fingerprint_folder()
+        files = {os.path.relpath(full_path, self.root).replace(os.sep, '/'): full_path
+                 for full_path, _, _ in fingerprint}
+
+        index = {}
+        for rel_path, full_path in files.items():
+            base, suffix = os.path.splitext(rel_path)
+            if suffix in COMPRESSED_SUFFIXES and base in files:
+                continue  # registered as a variant of the uncompressed file
+            entry = self._load(rel_path, full_path)
+            for suffix, encoding in COMPRESSED_SUFFIXES.items():
+                if rel_path + suffix in files:
+                    variant = self._load(rel_path + suffix, files[rel_path + suffix])
+                    variant.mimetype = entry.mimetype
+                    entry.variants[encoding] = variant
+            index[rel_path] = entry
+
+        with self._lock:
+            self._files = index
+            self._fingerprint = fingerprint
+
+    def get(self, path):
+        return self._files.get(path)
+
+    def serve(self, path):
+        """Serve ``path``, falling back to index.html for client-side routes"""
+        if self.watch_interval:
+            self._ensure_watching()
+        entry = self._files.get(path) if path else None
+        if entry is None:
+            entry = self._files.get('index.html')
+            if entry is None:
+                return None
+        return self._respond(entry)
+
+    def _respond(self, entry):
+        encodings = request.accept_encodings
+        selected, encoding = entry, None
+        for name in ('br', 'gzip'):
+            if name in entry.variants and encodings[name]:
+                selected, encoding = entry.variants[name], name
+                break
+
+        if request.if_none_match.contains(selected.etag):
+            response = Response(status=304)
+        elif selected.data is not None:
+            response = Response(selected.data, mimetype=entry.mimetype)
+        else:
+            response = send_file(selected.path, mimetype=entry.mimetype, etag=False, conditional=False)
+        if encoding and response.status_code != 304:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(selected.etag)
+        response.vary.add('Accept-Encoding')
+        hashed = HASHED_NAME_RE.search(os.path.basename(entry.path))
+        response.headers['Cache-Control'] = HASHED_CACHE_CONTROL if hashed else DEFAULT_CACHE_CONTROL
+        return response
+
+    @staticmethod
+    def _load(rel_path, full_path):
+        digest = hashlib.sha256()
+        data = bytearray()
+        keep = rel_path == 'index.html' or os.path.getsize(full_path) <= MAX_CACHED_SIZE
+        with open(full_path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(65536), b''):
+                digest.update(chunk)
+                if keep:
+                    data.extend(chunk)
+        entry = StaticFile(full_path, bytes(data) if keep else None)
+        entry.etag = digest.hexdigest()[:32]
+        return entry
+
+    def _fingerprint_folder(self):
+        """Sorted (path, mtime, size) of every file under the root"""
+        fingerprint = []
+        if self.root and os.path.isdir(self.root):
+            for directory, _, names in os.walk(self.root):
+                for name in names:
+                    full_path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except OSError:
+                        continue  # removed while walking
+                    fingerprint.append((full_path, stat.st_mtime_ns, stat.st_size))
+        return sorted(fingerprint)
+
+    def _ensure_watching(self):
+        # Threads do not survive a fork (gunicorn --preload), so start the
+        # watcher in each worker process on its first request
+        if self._watch_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watch_pid == os.getpid():
+                return
+            threading.Thread(target=self._watch, args=(self.watch_interval,),
+                             name='static-watch', daemon=True).start()
+            self._watch_pid = os.getpid()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                if self._fingerprint_folder() != self._fingerprint:
+                    self.rescan()
+            except OSError:
+                pass  # folder changed mid-scan; try again next tick